@@ -7,52 +7,82 @@ Run with: uvicorn app:app --reload --port 8000
 
 import os
 import json
-import uuid
+import queue
+import logging
+import secrets
+import time
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any, Dict, Optional
 from datetime import datetime
+import orjson
 from fastapi import FastAPI, Request, Response, Header
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from dotenv import load_dotenv
 
-from pp_server import ProfessorLockChatKitServer
-from chatkit_supabase_store import SupabaseStore
-
 load_dotenv()
 
+# Log records are queued from the event loop and written by a listener thread
+logger = logging.getLogger("parleyapp")
+logger.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+logger.propagate = False
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+logger.addHandler(QueueHandler(_log_queue))
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(
+    logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+)
+_log_listener = QueueListener(_log_queue, _log_handler)
+
+
+class ORJSONResponse(Response):
+    """JSON response rendered with orjson instead of the stdlib encoder"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
 # FastAPI app
 app = FastAPI(
     title="Predictive Play ChatKit Server",
     description="Self-hosted ChatKit server for Professor Lock AI",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware - Updated for your domains
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "https://predictive-play.com",
-        "https://www.predictive-play.com",
-        "https://*.predictive-play.com",
-        "https://*.vercel.app",
-        "http://localhost:3000",
-        "http://localhost:3001"
-    ],
+    # Starlette does not expand "*" inside allow_origins entries, so the
+    # subdomain wildcards are expressed as one regex compiled at startup
+    allow_origin_regex=(
+        r"https://([a-z0-9-]+\.)?predictive-play\.com"
+        r"|https://[a-z0-9-]+\.vercel\.app"
+        r"|http://localhost:300[01]"
+    ),
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
     expose_headers=["*"]
 )
 
-# Remove old PostgresStore implementation - using SupabaseStore instead
-# Initialize Supabase store
-data_store = SupabaseStore(
-    supabase_url=os.getenv("SUPABASE_URL"),
-    supabase_key=os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-)
+# Compress JSON responses, including non-streaming widget payloads from
+# /chatkit. The SSE stream sets Content-Encoding itself, which GZip leaves
+# alone, so events are not held back in the compressor's buffer
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
-# Initialize ChatKit server with Professor Lock
-chatkit_server = ProfessorLockChatKitServer(data_store)
+# Remove old PostgresStore implementation - using SupabaseStore instead
+# The Supabase store and ChatKit server are built in startup() so importing
+# this module does not pull in chatkit, agents, openai and supabase
+data_store = None
+chatkit_server = None
 
 # Old PostgresStore for reference (now replaced by SupabaseStore)
 '''
@@ -104,8 +134,8 @@ class _PostgresStore(Store):
     
     def generate_thread_id(self, context: Any) -> str:
         """Generate unique thread ID"""
-        import uuid
-        return f"thread_{uuid.uuid4().hex[:12]}"
+        import secrets
+        return f"thread_{secrets.token_hex(6)}"
     
     def generate_item_id(
         self, 
@@ -114,8 +144,8 @@ class _PostgresStore(Store):
         context: Any
     ) -> str:
         """Generate unique item ID"""
-        import uuid
-        return f"{item_type}_{uuid.uuid4().hex[:12]}"
+        import secrets
+        return f"{item_type}_{secrets.token_hex(6)}"
     
     async def load_thread(self, thread_id: str, context: Any) -> ThreadMetadata:
         """Load thread metadata"""
@@ -395,23 +425,63 @@ class _PostgresStore(Store):
 @app.on_event("startup")
 async def startup():
     """Initialize server on startup"""
-    print("=" * 60)
-    print("🎯 Predictive Play ChatKit Server Starting...")
-    print("=" * 60)
-    print(f"✅ Professor Lock Agent: Active")
-    print(f"📊 Supabase Store: Connected")
-    print(f"🔧 Widgets: Enabled (Search, Odds, Parlay, Trends)")
-    print(f"🔥 Tools: Enabled (Web Search, StatMuse, Betting Analysis)")
-    print(f"🌐 Server: http://0.0.0.0:{os.getenv('PORT', 8000)}")
-    print("=" * 60)
-    print("💰 Ready to lock in those winning bets! 🎲")
-    print("=" * 60)
+    global data_store, chatkit_server
+    _log_listener.start()
+
+    from chatkit_supabase_store import SupabaseStore
+    from pp_server import ProfessorLockChatKitServer
+
+    # Initialize Supabase store
+    data_store = SupabaseStore(
+        supabase_url=os.getenv("SUPABASE_URL"),
+        supabase_key=os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    )
+    # Initialize ChatKit server with Professor Lock
+    chatkit_server = ProfessorLockChatKitServer(data_store)
+
+    logger.info("🎯 Predictive Play ChatKit Server Starting...")
+    logger.info("✅ Professor Lock Agent: Active")
+    logger.info("📊 Supabase Store: Connected")
+    logger.info("🔧 Widgets: Enabled (Search, Odds, Parlay, Trends)")
+    logger.info("🔥 Tools: Enabled (Web Search, StatMuse, Betting Analysis)")
+    logger.info("🌐 Server: http://0.0.0.0:%s", os.getenv("PORT", 8000))
+    logger.info("💰 Ready to lock in those winning bets! 🎲")
+    await data_store.prewarm(size=int(os.getenv("SUPABASE_POOL_SIZE", 10)))
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Release pooled connections on shutdown"""
+    if data_store is not None:
+        await data_store.flush()
+        await data_store.close()
+    from parleyapp_tools import close_http_client
+    await close_http_client()
+    _log_listener.stop()
 
-@app.post("/api/chatkit/session")
+_last_timestamp: tuple[int, str] = (0, "")
+
+
+def _iso_timestamp() -> str:
+    """Current local time in ISO format, re-rendered at most once per second"""
+    global _last_timestamp
+    now = int(time.time())
+    if now != _last_timestamp[0]:
+        _last_timestamp = (now, datetime.fromtimestamp(now).isoformat())
+    return _last_timestamp[1]
+
+# Fixed-shape session response, split around the two generated ids
+_SESSION_PREFIX = b'{"client_secret":'
+_SESSION_MID = b',"session_id":'
+_SESSION_SUFFIX = (
+    b',"status":"active","self_hosted":true,"features":{"professor_lock":true,'
+    b'"widgets":true,"advanced_tools":true,"statmuse":true}}'
+)
+
+@app.post("/api/chatkit/session", response_model=None)
 async def create_chatkit_session(
     request: Request,
     authorization: Optional[str] = Header(None)
-):
+) -> Response:
     """
     Create self-hosted ChatKit session
     This endpoint replaces OpenAI's session endpoint
@@ -419,7 +489,7 @@ async def create_chatkit_session(
     try:
         # Verify user authentication
         if not authorization or not authorization.startswith("Bearer "):
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=401,
                 content={"error": "Missing or invalid authorization"}
             )
@@ -429,92 +499,73 @@ async def create_chatkit_session(
         # You could verify the token with Supabase here if needed
         # For now, we'll trust it since it's coming from your own web app
         
-        body = await request.json()
+        body = orjson.loads(await request.body())
         user_id = body.get("user_id")
         
         if not user_id:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=400,
                 content={"error": "user_id is required"}
             )
         
         # Generate simple client secret (since we control the server)
-        client_secret = f"cs_self_hosted_{user_id}_{uuid.uuid4().hex[:16]}"
-        session_id = f"session_{uuid.uuid4().hex[:16]}"
+        client_secret = f"cs_self_hosted_{user_id}_{secrets.token_hex(8)}"
+        session_id = f"session_{secrets.token_hex(8)}"
         
-        print(f"✅ Created ChatKit session for user: {user_id}")
+        logger.info("✅ Created ChatKit session for user: %s", user_id)
         
-        return JSONResponse({
-            "client_secret": client_secret,
-            "session_id": session_id,
-            "status": "active",
-            "self_hosted": True,
-            "features": {
-                "professor_lock": True,
-                "widgets": True,
-                "advanced_tools": True,
-                "statmuse": True
-            }
-        })
+        # Only the two ids vary; orjson quotes/escapes them so a user_id
+        # containing '"' cannot break out of the template
+        return Response(
+            content=(
+                _SESSION_PREFIX + orjson.dumps(client_secret)
+                + _SESSION_MID + orjson.dumps(session_id)
+                + _SESSION_SUFFIX
+            ),
+            media_type="application/json"
+        )
         
     except Exception as e:
-        print(f"❌ Error creating session: {e}")
-        return JSONResponse(
+        logger.error("❌ Error creating session: %s", e)
+        return ORJSONResponse(
             status_code=500,
             content={"error": str(e)}
         )
 
-@app.options("/chatkit")
-async def chatkit_options():
-    """CORS preflight support for ChatKit."""
-    return Response(status_code=204)
-
-@app.get("/chatkit")
-async def chatkit_get():
+@app.get("/chatkit", response_model=None)
+async def chatkit_get() -> Response:
     """Health/handshake route to satisfy ChatKit GET checks."""
-    return JSONResponse({
+    return ORJSONResponse({
         "status": "ok",
         "message": "Use POST for ChatKit events",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": _iso_timestamp()
     })
 
-@app.options("/chatkit")
-async def chatkit_options():
-    """Handle CORS preflight for ChatKit"""
-    return Response(
-        status_code=200,
-        headers={
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "POST, OPTIONS",
-            "Access-Control-Allow-Headers": "*",
-        }
-    )
-
-@app.post("/chatkit")
-async def chatkit_endpoint(request: Request):
+@app.post("/chatkit", response_model=None)
+async def chatkit_endpoint(request: Request) -> Response:
     """Main ChatKit endpoint"""
     
     try:
-        print("🎯 Received ChatKit request")
-        
-        # Get request body
+        # Raw bytes go straight to ChatKit, which validates them itself
         body = await request.body()
         
         # Get context (user info, etc)
+        headers = request.headers
         context = {
-            "user_id": request.headers.get("x-user-id"),
-            "session_id": request.headers.get("x-session-id"),
-            "user_email": request.headers.get("x-user-email"),
-            "user_tier": request.headers.get("x-user-tier", "free"),
+            "user_id": headers.get("x-user-id"),
+            "session_id": headers.get("x-session-id"),
+            "user_email": headers.get("x-user-email"),
+            "user_tier": headers.get("x-user-tier", "free"),
             "timestamp": datetime.now()
         }
         
-        print(f"📋 User context: {context['user_id']} ({context['user_tier']})")
+        logger.info("🎯 ChatKit request: %s (%s)", context["user_id"], context["user_tier"])
         
         # Process request
         result = await chatkit_server.process(body, context)
         
-        # Return streaming or JSON response
+        # Return streaming or JSON response. StreamingResult already yields
+        # SSE-framed bytes, so Starlette writes the chunks through as-is.
         if hasattr(result, '__aiter__'):  # It's a streaming result
             return StreamingResponse(
                 result,
@@ -522,6 +573,8 @@ async def chatkit_endpoint(request: Request):
                 headers={
                     "Cache-Control": "no-cache",
                     "Connection": "keep-alive",
+                    "X-Accel-Buffering": "no",
+                    "Content-Encoding": "identity",
                     "Access-Control-Allow-Origin": "*",
                     "Access-Control-Allow-Headers": "*",
                 }
@@ -537,10 +590,8 @@ async def chatkit_endpoint(request: Request):
             )
             
     except Exception as e:
-        print(f"❌ Error processing ChatKit request: {e}")
-        import traceback
-        traceback.print_exc()
-        return JSONResponse(
+        logger.exception("❌ Error processing ChatKit request: %s", e)
+        return ORJSONResponse(
             status_code=500,
             content={"error": str(e)},
             headers={
@@ -548,40 +599,57 @@ async def chatkit_endpoint(request: Request):
             }
         )
 
-@app.get("/health")
-async def health():
+# Only the timestamp varies between health checks, so the rest is spliced
+# in as pre-serialized bytes
+_HEALTH_PREFIX = b'{"status":"healthy","service":"ParleyApp ChatKit Server","version":"1.0.0","timestamp":'
+
+@app.get("/health", response_model=None)
+async def health() -> Response:
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "service": "ParleyApp ChatKit Server",
-        "version": "1.0.0",
-        "timestamp": datetime.now().isoformat()
-    }
+    return Response(
+        content=_HEALTH_PREFIX + orjson.dumps(_iso_timestamp()) + b"}",
+        media_type="application/json"
+    )
+
+# Static root payload, serialized once at import
+_ROOT_BYTES = orjson.dumps({
+    "service": "ParleyApp ChatKit Server",
+    "description": "Professor Lock AI Sports Betting Assistant",
+    "endpoints": {
+        "chatkit": "/chatkit",
+        "health": "/health"
+    },
+    "features": [
+        "Visual web search with progress widgets",
+        "Live odds comparison tables",
+        "Interactive parlay builders",
+        "StatMuse integration",
+        "Trend charts and analytics"
+    ]
+})
 
-@app.get("/")
-async def root():
+@app.get("/", response_model=None)
+async def root() -> Response:
     """Root endpoint with info"""
-    return {
-        "service": "ParleyApp ChatKit Server",
-        "description": "Professor Lock AI Sports Betting Assistant",
-        "endpoints": {
-            "chatkit": "/chatkit",
-            "health": "/health"
-        },
-        "features": [
-            "Visual web search with progress widgets",
-            "Live odds comparison tables",
-            "Interactive parlay builders",
-            "StatMuse integration",
-            "Trend charts and analytics"
-        ]
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 if __name__ == "__main__":
     import uvicorn
+    # The reloader only supports a single worker, so keep it to ENV=dev.
+    # More workers are opt-in through WEB_CONCURRENCY: the store's read cache
+    # is only shared between them when REDIS_URL is set, and the tool caches
+    # in parleyapp_tools stay per process either way
+    dev = os.getenv("ENV") == "dev"
+    workers = 1 if dev else int(os.getenv("WEB_CONCURRENCY", "1"))
+    # Workers inherit this, and the store sizes its read cache from it
+    os.environ["WEB_CONCURRENCY"] = str(workers)
     uvicorn.run(
-        app,
+        "app:app",
         host="0.0.0.0",
         port=int(os.getenv("PORT", 8000)),
-        reload=True
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
+        backlog=2048,
+        reload=dev
     )
@@ -711,7 +711,11 @@ class ChatKitServer(ABC, Generic[TContext]):
             after = items.after
 
     def _serialize(self, obj: BaseModel) -> bytes:
-        return obj.model_dump_json(by_alias=True, exclude_none=True).encode("utf-8")
+        # model_dump_json() decodes pydantic-core's bytes to str, which we would
+        # only encode straight back; ask the serializer for the bytes instead.
+        return obj.__pydantic_serializer__.to_json(
+            obj, by_alias=True, exclude_none=True
+        )
 
     def _to_thread_response(self, thread: ThreadMetadata | Thread) -> Thread:
         def is_hidden(item: ThreadItem) -> bool:
@@ -5,6 +5,34 @@ Custom widgets for the Professor Lock sports betting assistant
 
 from typing import List, Dict, Any, Optional, Literal
 
+# Static widget skeletons, built once at import. Builders copy them shallowly
+# and attach fresh children, so the templates themselves are never mutated.
+# Keep them flat: a nested dict here would be shared by every copy.
+_CARD_MD = {'type': 'Card', 'size': 'md', 'theme': 'dark'}
+_CARD_LG = {'type': 'Card', 'size': 'lg', 'theme': 'dark'}
+_CARD_FULL = {'type': 'Card', 'size': 'full', 'theme': 'dark'}
+
+_STATUS_CONFIG = {
+    'searching': {'icon': '🔍', 'text': 'Searching for data...', 'color': '#3B82F6'},
+    'analyzing': {'icon': '🤔', 'text': 'Analyzing results...', 'color': '#F59E0B'},
+    'complete': {'icon': '✅', 'text': 'Search complete!', 'color': '#10B981'}
+}
+
+_EVEN_ROW = {'type': 'Row', 'padding': 8, 'background': '#1E293B'}
+_ODD_ROW = {'type': 'Row', 'padding': 8, 'background': 'transparent'}
+_STAT_BOX = {'type': 'Box', 'padding': 8, 'background': '#1E293B'}
+_DETAIL_BOX = {'type': 'Box', 'padding': 12, 'background': '#1E293B'}
+
+
+def _pick_box(selected: bool) -> Dict[str, Any]:
+    """Pick card shell. Built per card rather than copied from a template,
+    since a shallow copy would share the nested border dict between cards."""
+    if selected:
+        return {'type': 'Box', 'padding': 12, 'background': '#1E3A5F', 'radius': 'md',
+                'border': {'size': 2, 'color': '#3B82F6'}}
+    return {'type': 'Box', 'padding': 12, 'background': '#1F2937', 'radius': 'md',
+            'border': {'size': 1, 'color': '#374151'}}
+
 class SportsWidgets:
     """Factory class for creating sports betting widgets"""
     
@@ -16,57 +44,41 @@ class SportsWidgets:
         progress: int = 0
     ) -> Dict[str, Any]:
         """Create a search progress widget"""
-        status_config = {
-            'searching': {'icon': '🔍', 'text': 'Searching for data...', 'color': '#3B82F6'},
-            'analyzing': {'icon': '🤔', 'text': 'Analyzing results...', 'color': '#F59E0B'},
-            'complete': {'icon': '✅', 'text': 'Search complete!', 'color': '#10B981'}
-        }
-        
-        config = status_config[status]
-        sources = sources or []
-        
-        widget = {
-            'type': 'Card',
-            'size': 'md',
-            'theme': 'dark',
-            'children': [
-                {
-                    'type': 'Row',
-                    'gap': 12,
-                    'align': 'center',
-                    'children': [
-                        {'type': 'Text', 'value': config['icon'], 'size': 'xl'},
-                        {
-                            'type': 'Col',
-                            'flex': 1,
-                            'gap': 4,
-                            'children': [
-                                {'type': 'Text', 'value': config['text'], 'weight': 'semibold', 'color': config['color']}
-                            ]
-                        }
-                    ]
-                }
-            ]
-        }
+        config = _STATUS_CONFIG[status]
         
+        header = [
+            {'type': 'Text', 'value': config['text'], 'weight': 'semibold', 'color': config['color']}
+        ]
         if current_search:
-            widget['children'][0]['children'][1]['children'].append({
+            header.append({
                 'type': 'Text', 'value': current_search, 'size': 'sm', 'color': '#9CA3AF', 'truncate': True
             })
         
+        children = [
+            {
+                'type': 'Row',
+                'gap': 12,
+                'align': 'center',
+                'children': [
+                    {'type': 'Text', 'value': config['icon'], 'size': 'xl'},
+                    {'type': 'Col', 'flex': 1, 'gap': 4, 'children': header}
+                ]
+            }
+        ]
+        
         if progress > 0:
-            widget['children'].append({
+            children.append({
                 'type': 'Box', 'height': 4, 'background': '#374151', 'radius': 'full',
                 'children': [{'type': 'Box', 'height': 4, 'width': f'{progress}%', 'background': config['color'], 'radius': 'full'}]
             })
         
         if sources:
-            widget['children'].append({
+            children.append({
                 'type': 'Row', 'gap': 8,
                 'children': [{'type': 'Badge', 'label': src, 'size': 'sm', 'variant': 'soft', 'color': 'info'} for src in sources]
             })
         
-        return widget
+        return {**_CARD_MD, 'children': children}
     
     @staticmethod
     def parlay_builder(picks: List[Dict], total_odds: str = '+0', stake: float = 10) -> Dict[str, Any]:
@@ -74,9 +86,7 @@ class SportsWidgets:
         selected = [p for p in picks if p.get('selected', False)]
         
         widget = {
-            'type': 'Card',
-            'size': 'lg',
-            'theme': 'dark',
+            **_CARD_LG,
             'children': [
                 {
                     'type': 'Row',
@@ -97,11 +107,7 @@ class SportsWidgets:
         for pick in picks:
             is_sel = pick.get('selected', False)
             pick_cards.append({
-                'type': 'Box',
-                'padding': 12,
-                'background': '#1E3A5F' if is_sel else '#1F2937',
-                'radius': 'md',
-                'border': {'size': 2 if is_sel else 1, 'color': '#3B82F6' if is_sel else '#374151'},
+                **_pick_box(is_sel),
                 'children': [{
                     'type': 'Row',
                     'justify': 'between',
@@ -131,9 +137,7 @@ class SportsWidgets:
         if selected:
             widget['children'].extend([
                 {
-                    'type': 'Box',
-                    'padding': 12,
-                    'background': '#1E293B',
+                    **_DETAIL_BOX,
                     'children': [{
                         'type': 'Col',
                         'gap': 8,
@@ -164,18 +168,14 @@ class SportsWidgets:
     def odds_table(title: str, team1: str, team2: str, odds: List[Dict]) -> Dict[str, Any]:
         """Create an odds comparison table"""
         return {
-            'type': 'Card',
-            'size': 'full',
-            'theme': 'dark',
+            **_CARD_FULL,
             'children': [
                 {'type': 'Title', 'value': title, 'size': 'lg', 'weight': 'bold'},
                 {
                     'type': 'Col',
                     'children': [
                         {
-                            'type': 'Row',
-                            'padding': 8,
-                            'background': '#1E293B' if i % 2 == 0 else 'transparent',
+                            **(_ODD_ROW if i & 1 else _EVEN_ROW),
                             'children': [
                                 {'type': 'Text', 'value': row['book'], 'width': '25%'},
                                 {'type': 'Badge', 'label': row['team1Odds'], 'color': 'info', 'size': 'sm'},
@@ -192,9 +192,7 @@ class SportsWidgets:
     def player_card(name: str, team: str, position: str, stats: List[Dict], props: List[Dict] = None) -> Dict[str, Any]:
         """Create a player card widget"""
         widget = {
-            'type': 'Card',
-            'size': 'lg',
-            'theme': 'dark',
+            **_CARD_LG,
             'children': [
                 {
                     'type': 'Row',
@@ -220,9 +218,7 @@ class SportsWidgets:
                     'gap': 12,
                     'children': [
                         {
-                            'type': 'Box',
-                            'padding': 8,
-                            'background': '#1E293B',
+                            **_STAT_BOX,
                             'children': [{
                                 'type': 'Col',
                                 'align': 'center',
@@ -241,9 +237,7 @@ class SportsWidgets:
             prop_widgets = []
             for prop in props:
                 prop_widgets.append({
-                    'type': 'Box',
-                    'padding': 12,
-                    'background': '#1E293B',
+                    **_DETAIL_BOX,
                     'children': [{
                         'type': 'Row',
                         'justify': 'between',
@@ -270,9 +264,7 @@ class SportsWidgets:
     def insights(insights: List[Dict], title: str = '💡 Key Insights') -> Dict[str, Any]:
         """Create a betting insights widget"""
         return {
-            'type': 'Card',
-            'size': 'md',
-            'theme': 'dark',
+            **_CARD_MD,
             'children': [
                 {'type': 'Title', 'value': title, 'size': 'lg', 'weight': 'bold'},
                 {
@@ -280,9 +272,7 @@ class SportsWidgets:
                     'gap': 12,
                     'children': [
                         {
-                            'type': 'Box',
-                            'padding': 12,
-                            'background': '#1E293B',
+                            **_DETAIL_BOX,
                             'children': [{
                                 'type': 'Row',
                                 'gap': 12,
@@ -38,8 +38,9 @@ CREATE TABLE chatkit_attachments (
 -- Indexes for performance
 CREATE INDEX IF NOT EXISTS idx_chatkit_threads_profile_id ON chatkit_threads(profile_id);
 CREATE INDEX IF NOT EXISTS idx_chatkit_threads_created_at ON chatkit_threads(created_at DESC);
-CREATE INDEX IF NOT EXISTS idx_chatkit_thread_items_thread_id ON chatkit_thread_items(thread_id);
-CREATE INDEX IF NOT EXISTS idx_chatkit_thread_items_created_at ON chatkit_thread_items(created_at DESC);
+-- Serve per-user thread lists and per-thread item pages as one index range scan
+CREATE INDEX IF NOT EXISTS idx_chatkit_threads_profile_created ON chatkit_threads(profile_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_chatkit_thread_items_thread_created ON chatkit_thread_items(thread_id, created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_chatkit_attachments_thread_id ON chatkit_attachments(thread_id);
 
 -- Row Level Security (RLS) Policies
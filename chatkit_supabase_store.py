@@ -3,15 +3,331 @@ Supabase-backed Store implementation for ChatKit
 Stores threads, messages, and attachments in Supabase PostgreSQL
 """
 
-import uuid
-import json
-from typing import Any, Literal, Optional
-from datetime import datetime
+import asyncio
+import logging
+import random
+import re
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import lru_cache
+from os import urandom
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Literal, Optional, Set, Tuple
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from chatkit.store import Store, Page
 from chatkit.types import ThreadMetadata, ThreadItem, Attachment
+import httpx
+from postgrest.exceptions import APIError
 from supabase import create_client, Client
+from cachetools import TTLCache
+import redis.asyncio as aioredis
 import os
-from pydantic import TypeAdapter
+from pydantic import TypeAdapter, ValidationError
+
+logger = logging.getLogger("parleyapp.store")
+
+# Building a TypeAdapter compiles a validator, so do it once per process
+_THREAD_ADAPTER: TypeAdapter[ThreadMetadata] = TypeAdapter(ThreadMetadata)
+_THREAD_ITEM_ADAPTER: TypeAdapter[ThreadItem] = TypeAdapter(ThreadItem)
+_ATTACHMENT_ADAPTER: TypeAdapter[Attachment] = TypeAdapter(Attachment)
+_THREAD_ITEM_LIST_ADAPTER: TypeAdapter[List[ThreadItem]] = TypeAdapter(List[ThreadItem])
+
+# Rate limits and gateway errors are worth retrying; constraint errors are not
+_RETRY_ATTEMPTS = 5
+_RETRYABLE_CODES = {"429", "500", "502", "503", "504"}
+# Longest Retry-After we will sleep for before trying again anyway
+_RETRY_AFTER_CAP = 10.0
+
+_ITEM_ID_PREFIXES = {
+    "message": "msg",
+    "tool_call": "tool",
+    "task": "task",
+    "workflow": "work",
+    "attachment": "att"
+}
+
+
+def _is_transient(error: Exception) -> bool:
+    """Whether a failed PostgREST call may succeed if simply retried"""
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return str(error.response.status_code) in _RETRYABLE_CODES
+    return isinstance(error, APIError) and str(error.code) in _RETRYABLE_CODES
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait in a Retry-After header, if any"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _raise_rate_limited(response: httpx.Response) -> None:
+    """Turn a 429 into an HTTPStatusError, which keeps the response headers
+    that postgrest-py's APIError drops, so _execute can honour Retry-After"""
+    if response.status_code == 429:
+        response.raise_for_status()
+
+
+def _profile_id(context: Any) -> Optional[str]:
+    """User id carried by the request context dict built in app.py, if any"""
+    return context.get("user_id") if isinstance(context, dict) else None
+
+
+def _encode_cursor(created_at: str, row_id: str) -> str:
+    """Opaque page cursor over the (created_at, id) sort key"""
+    return urlsafe_b64encode(f"{created_at}|{row_id}".encode()).decode()
+
+
+def _after_cursor(query: Any, after: str, desc: bool) -> Any:
+    """Restrict `query` to rows strictly past `after` in (created_at, id) order"""
+    op = "lt" if desc else "gt"
+    try:
+        created_at, row_id = urlsafe_b64decode(after.encode()).decode().split("|", 1)
+    except (ValueError, UnicodeDecodeError):
+        # Cursors handed out before the id tiebreaker are bare timestamps
+        return query.filter("created_at", op, after)
+    return query.or_(
+        f'created_at.{op}."{created_at}",and(created_at.eq."{created_at}",id.{op}."{row_id}")'
+    )
+
+
+@lru_cache(maxsize=1)
+def get_supabase_client(url: str, key: str) -> Client:
+    """Process-wide Supabase client, so its HTTP connection pool is shared"""
+    client = create_client(url, key)
+    client.postgrest.session.event_hooks["response"].append(_raise_rate_limited)
+    return client
+
+
+_redis: Optional[aioredis.Redis] = None
+
+
+def get_redis() -> Optional[aioredis.Redis]:
+    """Process-wide Redis client, or None when REDIS_URL is unset"""
+    global _redis
+    if _redis is None and os.getenv("REDIS_URL"):
+        _redis = aioredis.from_url(os.environ["REDIS_URL"])
+    return _redis
+
+
+class _ModelCache:
+    """Read cache that never holds anything. Used as is when several workers
+    run without Redis, since a per-process copy would let one worker keep
+    serving a thread that another has since rewritten"""
+
+    async def get(self, key: str) -> Optional[Any]:
+        return None
+
+    async def set(self, key: str, model: Any) -> None:
+        return None
+
+    async def delete(self, key: str) -> None:
+        return None
+
+    async def delete_prefix(self, prefix: str) -> None:
+        return None
+
+
+class _LocalModelCache(_ModelCache):
+    """Per-process TTL cache for single-worker deployments. Models are copied
+    in and out, so a caller mutating what it loaded cannot change the entry"""
+
+    def __init__(self, maxsize: int = 1000, ttl: float = 30):
+        self._entries: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Optional[Any]:
+        model = self._entries.get(key)
+        return None if model is None else model.model_copy(deep=True)
+
+    async def set(self, key: str, model: Any) -> None:
+        self._entries[key] = model.model_copy(deep=True)
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            self._entries.pop(key, None)
+
+
+class _RedisModelCache(_ModelCache):
+    """Cache held in Redis, so every worker sees the same entries and the
+    same invalidations. Redis errors degrade to uncached reads"""
+
+    def __init__(self, redis: aioredis.Redis, namespace: str, adapter: TypeAdapter, ttl: int = 60):
+        self._redis = redis
+        self._prefix = f"chatkit:{namespace}:"
+        self._adapter = adapter
+        self._ttl = ttl
+
+    async def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = await self._redis.get(self._prefix + key)
+            return None if raw is None else self._adapter.validate_json(raw)
+        except Exception as e:
+            # A model that no longer validates is treated as a miss too
+            logger.warning("Cache read failed for %s%s: %s", self._prefix, key, e)
+            return None
+
+    async def set(self, key: str, model: Any) -> None:
+        try:
+            await self._redis.set(self._prefix + key, self._adapter.dump_json(model), ex=self._ttl)
+        except Exception as e:
+            logger.warning("Cache write failed for %s%s: %s", self._prefix, key, e)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self._redis.delete(self._prefix + key)
+        except Exception as e:
+            logger.warning("Cache invalidation failed for %s%s: %s", self._prefix, key, e)
+
+    async def delete_prefix(self, prefix: str) -> None:
+        # Escape glob metacharacters so ids are matched literally
+        pattern = self._prefix + re.sub(r"([*?\[\]\\])", r"\\\1", prefix) + "*"
+        try:
+            keys = [key async for key in self._redis.scan_iter(match=pattern)]
+            if keys:
+                await self._redis.delete(*keys)
+        except Exception as e:
+            logger.warning("Cache invalidation failed for %s%s*: %s", self._prefix, prefix, e)
+
+
+def _model_cache(namespace: str, adapter: TypeAdapter) -> _ModelCache:
+    """Read cache suited to how many workers share the database. A per-process
+    cache is only safe when this process is known to be the only worker, so
+    it needs WEB_CONCURRENCY=1; an unset count is treated as possibly many"""
+    if os.getenv("WEB_CONCURRENCY") == "1":
+        return _LocalModelCache()
+    redis = get_redis()
+    if redis is not None:
+        return _RedisModelCache(redis, namespace, adapter)
+    return _ModelCache()
+
+
+class _BatchLoader:
+    """Coalesce concurrent single-key loads into one batched fetch"""
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+        delay: float = 0.005,
+    ):
+        self._batch_fn = batch_fn
+        self._delay = delay
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def load(self, key: Hashable) -> Any:
+        """Resolve `key` together with every other key requested in the same window"""
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not self._pending:
+                self._task = loop.create_task(self._dispatch())
+            future = self._pending[key] = loop.create_future()
+        # Shield so one cancelled caller does not cancel the shared future
+        return await asyncio.shield(future)
+
+    async def _dispatch(self) -> None:
+        await asyncio.sleep(self._delay)
+        batch, self._pending = self._pending, {}
+        try:
+            results = await self._batch_fn(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+
+class _WriteBatcher:
+    """Group concurrent row writes into one multi-row upsert"""
+
+    def __init__(
+        self,
+        write_fn: Callable[[List[Dict[str, Any]]], Awaitable[None]],
+        max_batch: int = 100,
+        delay: float = 0.005,
+    ):
+        self._write_fn = write_fn
+        self._max_batch = max_batch
+        self._delay = delay
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, row: Dict[str, Any]) -> None:
+        """Queue `row` and wait until the batch holding it is written"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self._max_batch:
+            self._spawn(self._write(self._take()))
+        elif self._timer is None:
+            self._timer = self._spawn(self._flush_later())
+        await asyncio.shield(future)
+
+    async def flush(self) -> None:
+        """Write anything still queued and wait for in-flight batches"""
+        # The queued rows are written here, so their timer has nothing left to do
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self._write(self._take())
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _spawn(self, coro: Awaitable[None]) -> asyncio.Task:
+        # Hold a reference so the task is not collected mid-write
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _take(self) -> List[Tuple[Dict[str, Any], asyncio.Future]]:
+        batch, self._pending = self._pending, []
+        return batch
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self._delay)
+        self._timer = None
+        await self._write(self._take())
+
+    async def _write(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        if not batch:
+            return
+        try:
+            await self._write_fn([row for row, _ in batch])
+        except Exception as e:
+            if len(batch) > 1:
+                # One bad row (a foreign key, a duplicate id) fails the whole
+                # statement, so retry rows on their own and fail only those
+                # that fail alone
+                await asyncio.gather(*(self._write([entry]) for entry in batch))
+                return
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
 
 
 class SupabaseStore(Store):
@@ -19,14 +335,84 @@ class SupabaseStore(Store):
     
     def __init__(self, supabase_url: Optional[str] = None, supabase_key: Optional[str] = None):
         """Initialize Supabase client"""
-        self.supabase: Client = create_client(
+        self.supabase: Client = get_supabase_client(
             supabase_url or os.getenv("SUPABASE_URL", ""),
             supabase_key or os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
         )
+        # Short-lived read caches, invalidated once this store's own writes land
+        self._thread_cache = _model_cache("thread", _THREAD_ADAPTER)
+        self._item_cache = _model_cache("item", _THREAD_ITEM_ADAPTER)
+        self._attachment_cache = _model_cache("attachment", _ATTACHMENT_ADAPTER)
+        # Concurrent point lookups collapse into one `in.(...)` query
+        self._item_loader = _BatchLoader(self._fetch_items)
+        self._attachment_loader = _BatchLoader(self._fetch_attachments)
+        # Item inserts from concurrent streams share one upsert
+        self._item_writer = _WriteBatcher(self._write_items)
+
+    async def prewarm(self, size: int = 1) -> None:
+        """Open `size` PostgREST keep-alive connections before the first request"""
+        def ping() -> None:
+            self.supabase.table("chatkit_threads").select("id").limit(1).execute()
+
+        try:
+            # Concurrent pings force the HTTP pool to open one connection each
+            await asyncio.gather(*(asyncio.to_thread(ping) for _ in range(size)))
+        except Exception as e:
+            logger.error("Error prewarming Supabase connection: %s", e)
+
+    async def _execute(self, query: Any) -> Any:
+        """Run a blocking PostgREST request on a worker thread, retrying transient failures"""
+        # supabase-py's sync client would otherwise stall the event loop for
+        # the whole HTTP round-trip
+        for attempt in range(_RETRY_ATTEMPTS):
+            try:
+                return await asyncio.to_thread(query.execute)
+            except Exception as e:
+                if attempt == _RETRY_ATTEMPTS - 1 or not _is_transient(e):
+                    raise
+                # Wait as long as a 429 asks, otherwise exponential backoff
+                # with full jitter, capped at 2s
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(2.0, 0.1 * 2 ** attempt))
+                await asyncio.sleep(min(delay, _RETRY_AFTER_CAP))
+
+    async def _fetch_items(self, keys: List[Hashable]) -> Dict[Hashable, Any]:
+        """Batch function for the item loader, keyed by (thread_id, item_id)"""
+        ids = list({item_id for _, item_id in keys})
+        result = await self._execute(
+            self.supabase.table("chatkit_thread_items").select("id,thread_id,item_data").in_("id", ids)
+        )
+        return {(row["thread_id"], row["id"]): row["item_data"] for row in result.data}
+
+    async def _fetch_attachments(self, keys: List[Hashable]) -> Dict[Hashable, Any]:
+        """Batch function for the attachment loader, keyed by attachment_id"""
+        result = await self._execute(
+            self.supabase.table("chatkit_attachments").select("id,attachment_data").in_("id", keys)
+        )
+        return {row["id"]: row["attachment_data"] for row in result.data}
+
+    async def _write_items(self, rows: List[Dict[str, Any]]) -> None:
+        """Write function for the item batcher"""
+        await self._execute(self.supabase.table("chatkit_thread_items").upsert(rows))
+
+    async def flush(self) -> None:
+        """Write any thread items still waiting in the batcher"""
+        try:
+            await self._item_writer.flush()
+        except Exception as e:
+            logger.error("Error flushing thread items: %s", e)
+
+    async def close(self) -> None:
+        """Close the pooled HTTP session held by the Supabase client"""
+        try:
+            self.supabase.postgrest.session.close()
+        except Exception as e:
+            logger.error("Error closing Supabase connection: %s", e)
     
     def generate_thread_id(self, context: Any) -> str:
         """Generate unique thread ID"""
-        return f"thread_{uuid.uuid4().hex}"
+        return f"thread_{urandom(16).hex()}"
     
     def generate_item_id(
         self,
@@ -35,20 +421,16 @@ class SupabaseStore(Store):
         context: Any,
     ) -> str:
         """Generate unique item ID with type prefix"""
-        prefixes = {
-            "message": "msg",
-            "tool_call": "tool",
-            "task": "task",
-            "workflow": "work",
-            "attachment": "att"
-        }
-        prefix = prefixes.get(item_type, "item")
-        return f"{prefix}_{uuid.uuid4().hex}"
+        prefix = _ITEM_ID_PREFIXES.get(item_type, "item")
+        return f"{prefix}_{urandom(16).hex()}"
     
     async def load_thread(self, thread_id: str, context: Any) -> ThreadMetadata:
         """Load thread metadata from Supabase"""
+        cached = await self._thread_cache.get(thread_id)
+        if cached is not None:
+            return cached
         try:
-            result = self.supabase.table("chatkit_threads").select("*").eq("id", thread_id).execute()
+            result = await self._execute(self.supabase.table("chatkit_threads").select("id,title,created_at,metadata").eq("id", thread_id))
             
             if not result.data or len(result.data) == 0:
                 # Return new thread if not found
@@ -59,14 +441,16 @@ class SupabaseStore(Store):
                 )
             
             thread_data = result.data[0]
-            return ThreadMetadata(
+            thread = ThreadMetadata(
                 id=thread_data["id"],
                 title=thread_data.get("title"),
-                created_at=datetime.fromisoformat(thread_data["created_at"]),
+                created_at=thread_data["created_at"],
                 metadata=thread_data.get("metadata", {})
             )
+            await self._thread_cache.set(thread_id, thread)
+            return thread
         except Exception as e:
-            print(f"Error loading thread {thread_id}: {e}")
+            logger.error("Error loading thread %s: %s", thread_id, e)
             # Return new thread on error
             return ThreadMetadata(
                 id=thread_id,
@@ -82,13 +466,15 @@ class SupabaseStore(Store):
                 "title": thread.title,
                 "created_at": thread.created_at.isoformat(),
                 "metadata": thread.metadata,
-                "profile_id": context.get("user_id") if isinstance(context, dict) else None
+                "profile_id": _profile_id(context)
             }
             
             # Upsert (insert or update)
-            self.supabase.table("chatkit_threads").upsert(thread_dict).execute()
+            await self._execute(self.supabase.table("chatkit_threads").upsert(thread_dict))
         except Exception as e:
-            print(f"Error saving thread {thread.id}: {e}")
+            logger.error("Error saving thread %s: %s", thread.id, e)
+        # Evict only after the write, so a load racing it cannot re-cache the old row
+        await self._thread_cache.delete(thread.id)
     
     async def load_thread_items(
         self,
@@ -100,36 +486,41 @@ class SupabaseStore(Store):
     ) -> Page[ThreadItem]:
         """Load thread items (messages, widgets, etc.) from Supabase"""
         try:
-            query = self.supabase.table("chatkit_thread_items").select("*").eq("thread_id", thread_id)
+            query = self.supabase.table("chatkit_thread_items").select("id,item_data,created_at").eq("thread_id", thread_id)
             
-            # Handle pagination
+            desc = order != "asc"
+
+            # Handle pagination - continue past the (created_at, id) cursor
             if after:
-                query = query.gt("created_at", after)
+                query = _after_cursor(query, after, desc)
             
-            # Order
-            if order == "asc":
-                query = query.order("created_at", desc=False)
-            else:
-                query = query.order("created_at", desc=True)
+            # Order, with id as a tiebreaker so pages are stable
+            query = query.order("created_at", desc=desc).order("id", desc=desc)
             
-            query = query.limit(limit)
-            result = query.execute()
-
-            # Deserialize items into typed ThreadItem
-            items: list[ThreadItem] = []
-            adapter = TypeAdapter(ThreadItem)
-            for item_row in result.data:
-                try:
-                    item_json = item_row.get("item_data", {})
-                    typed_item: ThreadItem = adapter.validate_python(item_json)
-                    items.append(typed_item)
-                except Exception as e:
-                    print(f"Error deserializing item {item_row.get('id')}: {e}")
-
-            # Determine pagination cursor using created_at of last item
-            has_more = len(items) >= limit
+            # Fetch one extra row to learn whether another page exists
+            query = query.limit(limit + 1)
+            result = await self._execute(query)
+            has_more = len(result.data) > limit
+            rows = result.data[:limit]
+
+            # Deserialize the page in one validator pass; only if some row is
+            # bad, redo it row by row so the rest of the page still loads
+            items: list[ThreadItem]
+            try:
+                items = _THREAD_ITEM_LIST_ADAPTER.validate_python(
+                    [item_row.get("item_data", {}) for item_row in rows]
+                )
+            except ValidationError:
+                items = []
+                for item_row in rows:
+                    try:
+                        items.append(_THREAD_ITEM_ADAPTER.validate_python(item_row.get("item_data", {})))
+                    except ValidationError as e:
+                        logger.error("Error deserializing item %s: %s", item_row.get('id'), e)
+
+            # Cursor from the last row on the page, even if it failed to parse
             after_cursor = (
-                items[-1].created_at.isoformat() if items and has_more else None
+                _encode_cursor(rows[-1]["created_at"], rows[-1]["id"]) if rows else None
             )
 
             return Page(
@@ -138,7 +529,7 @@ class SupabaseStore(Store):
                 after=after_cursor,
             )
         except Exception as e:
-            print(f"Error loading thread items: {e}")
+            logger.error("Error loading thread items: %s", e)
             return Page(data=[], has_more=False, after=None)
     
     async def save_attachment(self, attachment: Attachment, context: Any) -> None:
@@ -149,34 +540,40 @@ class SupabaseStore(Store):
                 "thread_id": getattr(attachment, 'thread_id', None),
                 "attachment_data": attachment.model_dump(mode="json"),
                 "created_at": datetime.now().isoformat(),
-                "profile_id": context.get("user_id") if isinstance(context, dict) else None
+                "profile_id": _profile_id(context)
             }
             
-            self.supabase.table("chatkit_attachments").upsert(attachment_dict).execute()
+            await self._execute(self.supabase.table("chatkit_attachments").upsert(attachment_dict))
         except Exception as e:
-            print(f"Error saving attachment: {e}")
+            logger.error("Error saving attachment: %s", e)
+        await self._attachment_cache.delete(attachment.id)
     
     async def load_attachment(self, attachment_id: str, context: Any) -> Attachment:
         """Load attachment from Supabase"""
+        cached = await self._attachment_cache.get(attachment_id)
+        if cached is not None:
+            return cached
         try:
-            result = self.supabase.table("chatkit_attachments").select("*").eq("id", attachment_id).execute()
+            attachment_data = await self._attachment_loader.load(attachment_id)
             
-            if not result.data or len(result.data) == 0:
+            if attachment_data is None:
                 raise ValueError(f"Attachment {attachment_id} not found")
             
-            attachment_data = result.data[0]["attachment_data"]
-            # Reconstruct Attachment from dict (this needs proper type handling)
-            return Attachment(**attachment_data)
+            # Attachment is a discriminated union, so validate through the adapter
+            attachment = _ATTACHMENT_ADAPTER.validate_python(attachment_data)
+            await self._attachment_cache.set(attachment_id, attachment)
+            return attachment
         except Exception as e:
-            print(f"Error loading attachment: {e}")
+            logger.error("Error loading attachment: %s", e)
             raise
     
     async def delete_attachment(self, attachment_id: str, context: Any) -> None:
         """Delete attachment from Supabase"""
         try:
-            self.supabase.table("chatkit_attachments").delete().eq("id", attachment_id).execute()
+            await self._execute(self.supabase.table("chatkit_attachments").delete().eq("id", attachment_id))
         except Exception as e:
-            print(f"Error deleting attachment: {e}")
+            logger.error("Error deleting attachment: %s", e)
+        await self._attachment_cache.delete(attachment_id)
     
     async def load_threads(
         self,
@@ -187,38 +584,39 @@ class SupabaseStore(Store):
     ) -> Page[ThreadMetadata]:
         """Load list of threads for a user"""
         try:
-            query = self.supabase.table("chatkit_threads").select("*")
+            query = self.supabase.table("chatkit_threads").select("id,title,created_at,metadata")
             
             # Filter by user if context provides it
-            if isinstance(context, dict) and context.get("user_id"):
-                query = query.eq("profile_id", context["user_id"])
+            profile_id = _profile_id(context)
+            if profile_id:
+                query = query.eq("profile_id", profile_id)
             
-            # Pagination
+            desc = order != "asc"
+
+            # Pagination - continue past the (created_at, id) cursor
             if after:
-                query = query.gt("created_at", after)
+                query = _after_cursor(query, after, desc)
             
-            # Order
-            if order == "asc":
-                query = query.order("created_at", desc=False)
-            else:
-                query = query.order("created_at", desc=True)
+            # Order, with id as a tiebreaker so pages are stable
+            query = query.order("created_at", desc=desc).order("id", desc=desc)
             
-            query = query.limit(limit)
-            result = query.execute()
+            # Fetch one extra row to learn whether another page exists
+            query = query.limit(limit + 1)
+            result = await self._execute(query)
+            has_more = len(result.data) > limit
+            rows = result.data[:limit]
             
             threads = []
-            for thread_data in result.data:
+            for thread_data in rows:
                 threads.append(ThreadMetadata(
                     id=thread_data["id"],
                     title=thread_data.get("title"),
-                    created_at=datetime.fromisoformat(thread_data["created_at"]),
+                    created_at=thread_data["created_at"],
                     metadata=thread_data.get("metadata", {})
                 ))
             
-            has_more = len(threads) >= limit
-
             after_cursor = (
-                threads[-1].created_at.isoformat() if threads and has_more else None
+                _encode_cursor(rows[-1]["created_at"], rows[-1]["id"]) if rows else None
             )
 
             return Page(
@@ -227,9 +625,9 @@ class SupabaseStore(Store):
                 after=after_cursor,
             )
         except Exception as e:
-            print(f"Error loading threads: {e}")
+            logger.error("Error loading threads: %s", e)
             return Page(data=[], has_more=False, after=None)
-    
+
     async def add_thread_item(
         self, thread_id: str, item: ThreadItem, context: Any
     ) -> None:
@@ -240,13 +638,15 @@ class SupabaseStore(Store):
                 "thread_id": thread_id,
                 "item_data": item.model_dump(mode="json"),
                 "created_at": item.created_at.isoformat(),
-                "profile_id": context.get("user_id") if isinstance(context, dict) else None
+                "profile_id": _profile_id(context)
             }
             
-            self.supabase.table("chatkit_thread_items").insert(item_dict).execute()
+            # Resolves once the batch holding this row is written, so the
+            # item is readable by the time the caller moves on
+            await self._item_writer.submit(item_dict)
         except Exception as e:
-            print(f"Error adding thread item: {e}")
-    
+            logger.error("Error adding thread item: %s", e)
+
     async def save_item(self, thread_id: str, item: ThreadItem, context: Any) -> None:
         """Update an existing thread item"""
         try:
@@ -255,44 +655,48 @@ class SupabaseStore(Store):
                 "thread_id": thread_id,
                 "item_data": item.model_dump(mode="json"),
                 "created_at": item.created_at.isoformat(),
-                "profile_id": context.get("user_id") if isinstance(context, dict) else None
+                "profile_id": _profile_id(context)
             }
             
-            self.supabase.table("chatkit_thread_items").upsert(item_dict).execute()
+            await self._execute(self.supabase.table("chatkit_thread_items").upsert(item_dict))
         except Exception as e:
-            print(f"Error saving thread item: {e}")
+            logger.error("Error saving thread item: %s", e)
+        await self._item_cache.delete(f"{thread_id}:{item.id}")
     
     async def load_item(self, thread_id: str, item_id: str, context: Any) -> ThreadItem:
         """Load a specific thread item"""
+        cached = await self._item_cache.get(f"{thread_id}:{item_id}")
+        if cached is not None:
+            return cached
         try:
-            result = self.supabase.table("chatkit_thread_items").select("*").eq("id", item_id).eq("thread_id", thread_id).execute()
+            item_data = await self._item_loader.load((thread_id, item_id))
             
-            if not result.data or len(result.data) == 0:
+            if item_data is None:
                 raise ValueError(f"Item {item_id} not found in thread {thread_id}")
             
-            item_data = result.data[0]["item_data"]
             # Reconstruct ThreadItem
-            adapter = TypeAdapter(ThreadItem)
-            return adapter.validate_python(item_data)
+            item = _THREAD_ITEM_ADAPTER.validate_python(item_data)
+            await self._item_cache.set(f"{thread_id}:{item_id}", item)
+            return item
         except Exception as e:
-            print(f"Error loading thread item: {e}")
+            logger.error("Error loading thread item: %s", e)
             raise
     
     async def delete_thread(self, thread_id: str, context: Any) -> None:
         """Delete a thread and all its items"""
         try:
-            # Delete thread items first
-            self.supabase.table("chatkit_thread_items").delete().eq("thread_id", thread_id).execute()
-            
-            # Delete thread
-            self.supabase.table("chatkit_threads").delete().eq("id", thread_id).execute()
+            # Items and attachments go with it via ON DELETE CASCADE
+            await self._execute(self.supabase.table("chatkit_threads").delete().eq("id", thread_id))
         except Exception as e:
-            print(f"Error deleting thread: {e}")
+            logger.error("Error deleting thread: %s", e)
+        await self._thread_cache.delete(thread_id)
+        await self._item_cache.delete_prefix(f"{thread_id}:")
     
     async def delete_thread_item(self, thread_id: str, item_id: str, context: Any) -> None:
         """Delete a specific thread item (required by ChatKit v1.0.2+)"""
         try:
-            self.supabase.table("chatkit_thread_items").delete().eq("id", item_id).eq("thread_id", thread_id).execute()
+            await self._execute(self.supabase.table("chatkit_thread_items").delete().eq("id", item_id).eq("thread_id", thread_id))
         except Exception as e:
-            print(f"Error deleting thread item {item_id}: {e}")
+            logger.error("Error deleting thread item %s: %s", item_id, e)
+        await self._item_cache.delete(f"{thread_id}:{item_id}")
 
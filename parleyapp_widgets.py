@@ -3,7 +3,11 @@ ParleyApp Custom Widgets for Professor Lock ChatKit
 Advanced sports betting widgets with interactive elements
 """
 
-from typing import Dict, Any, List, Optional
+import math
+from functools import lru_cache, partial
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, Optional, TypedDict
+import numpy as np
 from chatkit.widgets import (
     Card, Text, Title, Button, Row, Col, Box, Markdown,
     ListView, ListViewItem, Badge, Icon, Divider, Spacer,
@@ -11,27 +15,90 @@ from chatkit.widgets import (
 )
 from chatkit.actions import ActionConfig
 
+class ParlayLeg(TypedDict, total=False):
+    """One leg as passed to create_parlay_builder_widget"""
+    pick: str
+    match: str
+    odds: int
+    confidence: int
+
+_SEARCH_ICONS: Mapping[str, str] = MappingProxyType({
+    "injury": "medical-cross",
+    "weather": "cloud",
+    "news": "newspaper",
+    "general": "search"
+})
+
+# Badge colour by confidence tier, indexed by (c >= 60) + (c >= 75)
+_CONFIDENCE_BADGE_COLORS = ("danger", "warning", "success")
+
+_fmt_money = "${:,.2f}".format
+
+# Small soft badge used for the odds board's line columns
+_soft_badge = partial(Badge, variant="soft", size="sm")
+
+# Style-only layout widgets, shared by every build; treat them as read-only
+_SPACER = Spacer()
+_SPACER_8 = Spacer(minSize="8px")
+_SPACER_12 = Spacer(minSize="12px")
+_SPACER_16 = Spacer(minSize="16px")
+_DIVIDER_8 = Divider(spacing="8px")
+_DIVIDER_12 = Divider(spacing="12px")
+
+# Empty-state cards are shared singletons; treat them as read-only
+@lru_cache(maxsize=1)
+def _empty_odds_card() -> Card:
+    """Shared empty odds board. Built on first use rather than at import, so
+    a widget that fails validation cannot stop the module from importing"""
+    return Card(
+        size="full",
+        children=[
+            Row(align="center", gap="8px", children=[
+                Icon(name="chart-line", size="md", color="#168aa2"),
+                Title(value="📊 Live Odds Board", size="md"),
+                _SPACER,
+                Button(
+                    label="Refresh",
+                    size="sm",
+                    variant="ghost",
+                    onClickAction=ActionConfig(type="refresh_odds")
+                )
+            ]),
+            Text(value="No games on the board right now", size="sm", color="#888")
+        ]
+    )
+
+_EMPTY_PARLAY_CARD = Card(
+    size="full",
+    theme="dark",
+    children=[
+        Title(value="🎯 Professor Lock's Parlay Builder", size="lg", weight="bold"),
+        Text(value="Add picks to start your parlay", size="sm", color="#888"),
+        Button(
+            label="+ Add Leg",
+            size="sm",
+            variant="outline",
+            onClickAction=ActionConfig(type="add_parlay_leg")
+        )
+    ]
+)
+
+@lru_cache(maxsize=512)
 def create_search_progress_widget(query: str, search_type: str = "general") -> Card:
-    """Create live search progress widget"""
-    
-    search_icons = {
-        "injury": "medical-cross",
-        "weather": "cloud",
-        "news": "newspaper",
-        "general": "search"
-    }
+    """Create live search progress widget. Cached per (query, search_type), so
+    treat the returned card as read-only"""
     
     return Card(
         size="md",
         theme="dark",
         children=[
             Row(align="center", gap="8px", children=[
-                Icon(name=search_icons.get(search_type, "search"), size="md", color="#168aa2"),
+                Icon(name=_SEARCH_ICONS.get(search_type, "search"), size="md", color="#168aa2"),
                 Title(value="🔍 Live Search", size="sm"),
-                Spacer(),
+                _SPACER,
                 Badge(label="SEARCHING", color="warning", variant="soft", pill=True)
             ]),
-            Divider(spacing="8px"),
+            _DIVIDER_8,
             Text(
                 value=f"Searching: {query}",
                 italic=True,
@@ -46,52 +113,53 @@ def create_search_progress_widget(query: str, search_type: str = "general") -> C
         ]
     )
 
-def create_odds_comparison_widget(games: List[Dict[str, Any]]) -> Card:
-    """Create live odds comparison table"""
+def _odds_row(idx: int, game: Dict[str, Any]) -> ListViewItem:
+    """One game row of the live odds board"""
+    return ListViewItem(
+        children=[
+            Row(gap="12px", align="center", children=[
+                Col(flex=3, children=[
+                    Text(value=game["matchup"], weight="semibold", size="sm"),
+                    Text(value=game.get("time", ""), size="xs", color="#888")
+                ]),
+                Col(flex=1, children=[
+                    _soft_badge(label=str(game.get("spread", "N/A")), color="info")
+                ]),
+                Col(flex=1, children=[
+                    _soft_badge(label=f"O/U {game.get('total', 'N/A')}", color="secondary")
+                ]),
+                Col(flex=2, children=[
+                    Text(value=f"ML: {game.get('home_ml', 'N/A')}", size="xs"),
+                    Text(value=f"ML: {game.get('away_ml', 'N/A')}", size="xs")
+                ]),
+                Button(
+                    label="Analyze",
+                    size="xs",
+                    variant="outline",
+                    onClickAction=ActionConfig(
+                        type="analyze_game",
+                        payload={"game": game, "index": idx}
+                    )
+                )
+            ])
+        ]
+    )
+
+def create_odds_comparison_widget(
+    games: List[Dict[str, Any]],
+    page: int = 0,
+    page_size: int = 10,
+    sport: Optional[str] = None
+) -> Card:
+    """Create live odds comparison table, one page of games at a time.
+    `sport` rides along in the "Load more" payload so the server can refetch."""
     
-    odds_rows = []
-    for idx, game in enumerate(games):
-        odds_rows.append(
-            ListViewItem(
-                children=[
-                    Row(gap="12px", align="center", children=[
-                        Col(flex=3, children=[
-                            Text(value=game["matchup"], weight="semibold", size="sm"),
-                            Text(value=game.get("time", ""), size="xs", color="#888")
-                        ]),
-                        Col(flex=1, children=[
-                            Badge(
-                                label=str(game.get("spread", "N/A")), 
-                                color="info", 
-                                variant="soft",
-                                size="sm"
-                            )
-                        ]),
-                        Col(flex=1, children=[
-                            Badge(
-                                label=f"O/U {game.get('total', 'N/A')}", 
-                                color="secondary", 
-                                variant="soft",
-                                size="sm"
-                            )
-                        ]),
-                        Col(flex=2, children=[
-                            Text(value=f"ML: {game.get('home_ml', 'N/A')}", size="xs"),
-                            Text(value=f"ML: {game.get('away_ml', 'N/A')}", size="xs")
-                        ]),
-                        Button(
-                            label="Analyze",
-                            size="xs",
-                            variant="outline",
-                            onClickAction=ActionConfig(
-                                type="analyze_game",
-                                payload={"game": game, "index": idx}
-                            )
-                        )
-                    ])
-                ]
-            )
-        )
+    if not games:
+        return _empty_odds_card()
+    start = page * page_size
+    # Only the visible page is turned into widgets; indexes stay board-wide
+    odds_rows = [_odds_row(idx, game) for idx, game in enumerate(games[start:start + page_size], start)]
+    has_more = start + page_size < len(games)
     
     return Card(
         size="full",
@@ -99,7 +167,7 @@ def create_odds_comparison_widget(games: List[Dict[str, Any]]) -> Card:
             Row(align="center", gap="8px", children=[
                 Icon(name="chart-line", size="md", color="#168aa2"),
                 Title(value="📊 Live Odds Board", size="md"),
-                Spacer(),
+                _SPACER,
                 Button(
                     label="Refresh",
                     size="sm",
@@ -107,55 +175,64 @@ def create_odds_comparison_widget(games: List[Dict[str, Any]]) -> Card:
                     onClickAction=ActionConfig(type="refresh_odds")
                 )
             ]),
-            Divider(spacing="8px"),
-            ListView(children=odds_rows, limit=10)
+            _DIVIDER_8,
+            ListView(children=odds_rows, limit=page_size),
+            *([Button(
+                label="Load more",
+                variant="outline",
+                size="sm",
+                block=True,
+                onClickAction=ActionConfig(type="paginate_odds", payload={"page": page + 1, "sport": sport})
+            )] if has_more else [])
         ]
     )
 
-def create_parlay_builder_widget(legs: List[Dict[str, Any]], stake: float = 100) -> Card:
+def _parlay_leg_item(i: int, leg: ParlayLeg) -> ListViewItem:
+    """One leg of the parlay builder, with its remove button"""
+    pick, match, odds = leg["pick"], leg.get("match", ""), leg.get("odds", "")
+    confidence = leg.get("confidence", 0)
+    confidence_color = _CONFIDENCE_BADGE_COLORS[(confidence >= 60) + (confidence >= 75)]
+    
+    return ListViewItem(children=[
+        Row(gap="8px", align="center", children=[
+            Badge(label=str(i+1), variant="solid", pill=True, size="sm", color="info"),
+            Col(flex=1, children=[
+                Text(value=pick, weight="semibold", size="sm"),
+                Text(value=f"{match} • {odds}", size="xs", color="#888")
+            ]),
+            Badge(
+                label=f"{confidence}%", 
+                color=confidence_color, 
+                variant="soft",
+                size="sm"
+            ),
+            Button(
+                label="❌",
+                size="xs",
+                variant="ghost",
+                color="danger",
+                onClickAction=ActionConfig(
+                    type="remove_parlay_leg",
+                    payload={"index": i}
+                )
+            )
+        ])
+    ])
+
+def create_parlay_builder_widget(legs: List[ParlayLeg], stake: float = 100) -> Card:
     """Create interactive parlay builder"""
     
+    if not legs:
+        return _EMPTY_PARLAY_CARD
+    
     # Calculate total odds
-    total_odds = 1.0
-    for leg in legs:
-        decimal_odds = _american_to_decimal(leg.get("odds", -110))
-        total_odds *= decimal_odds
+    total_odds = _total_decimal_odds(legs)
     
     potential_payout = stake * total_odds
     profit = potential_payout - stake
     
     # Create leg items
-    leg_items = []
-    for i, leg in enumerate(legs):
-        confidence_color = "success" if leg.get("confidence", 0) >= 75 else "warning" if leg.get("confidence", 0) >= 60 else "danger"
-        
-        leg_items.append(
-            ListViewItem(children=[
-                Row(gap="8px", align="center", children=[
-                    Badge(label=str(i+1), variant="solid", pill=True, size="sm", color="info"),
-                    Col(flex=1, children=[
-                        Text(value=leg["pick"], weight="semibold", size="sm"),
-                        Text(value=f"{leg.get('match', '')} • {leg.get('odds', '')}", size="xs", color="#888")
-                    ]),
-                    Badge(
-                        label=f"{leg.get('confidence', 0)}%", 
-                        color=confidence_color, 
-                        variant="soft",
-                        size="sm"
-                    ),
-                    Button(
-                        label="❌",
-                        size="xs",
-                        variant="ghost",
-                        color="danger",
-                        onClickAction=ActionConfig(
-                            type="remove_parlay_leg",
-                            payload={"index": i}
-                        )
-                    )
-                ])
-            ])
-        )
+    leg_items = [_parlay_leg_item(i, leg) for i, leg in enumerate(legs)]
     
     return Card(
         size="full",
@@ -166,7 +243,7 @@ def create_parlay_builder_widget(legs: List[Dict[str, Any]], stake: float = 100)
                 Icon(name="target", size="lg", color="#168aa2"),
                 Title(value="🎯 Professor Lock's Parlay Builder", size="lg", weight="bold"),
             ]),
-            Divider(spacing="12px"),
+            _DIVIDER_12,
             
             # Legs section
             Box(
@@ -183,12 +260,12 @@ def create_parlay_builder_widget(legs: List[Dict[str, Any]], stake: float = 100)
                             onClickAction=ActionConfig(type="add_parlay_leg")
                         )
                     ]),
-                    Spacer(minSize="8px"),
+                    _SPACER_8,
                     ListView(children=leg_items)
                 ]
             ),
             
-            Spacer(minSize="12px"),
+            _SPACER_12,
             
             # Odds calculation
             Box(
@@ -203,21 +280,21 @@ def create_parlay_builder_widget(legs: List[Dict[str, Any]], stake: float = 100)
                     ]),
                     Row(justify="between", children=[
                         Text(value="Risk Amount:", weight="medium"),
-                        Text(value=f"${stake:.2f}", weight="medium")
+                        Text(value=_fmt_money(stake), weight="medium")
                     ]),
-                    Divider(spacing="8px"),
+                    _DIVIDER_8,
                     Row(justify="between", children=[
                         Text(value="Potential Payout:", weight="bold", size="lg"),
-                        Text(value=f"${potential_payout:.2f}", weight="bold", size="lg", color="#10b981")
+                        Text(value=_fmt_money(potential_payout), weight="bold", size="lg", color="#10b981")
                     ]),
                     Row(justify="between", children=[
                         Text(value="Profit:", weight="medium"),
-                        Text(value=f"${profit:.2f}", weight="medium", color="#10b981")
+                        Text(value=_fmt_money(profit), weight="medium", color="#10b981")
                     ])
                 ]
             ),
             
-            Spacer(minSize="16px"),
+            _SPACER_16,
             
             # Action buttons
             Row(gap="12px", children=[
@@ -250,14 +327,11 @@ def create_parlay_builder_widget(legs: List[Dict[str, Any]], stake: float = 100)
 def create_trends_chart_widget(trends_data: Dict[str, Any]) -> Card:
     """Create performance trends chart"""
     
-    # Convert trends to chart format
-    chart_data = []
-    for trend in trends_data.get("trends", []):
-        chart_data.append({
-            "date": trend["date"],
-            "hit_rate": trend["hit_rate"],
-            "roi": trend.get("roi", 0)
-        })
+    # Convert trends to chart format; Chart.data is row-oriented, one dict per point
+    chart_data = [
+        {"date": trend["date"], "hit_rate": trend["hit_rate"], "roi": trend.get("roi", 0)}
+        for trend in trends_data.get("trends", [])
+    ]
     
     return Card(
         size="full",
@@ -265,10 +339,10 @@ def create_trends_chart_widget(trends_data: Dict[str, Any]) -> Card:
             Row(align="center", gap="8px", children=[
                 Icon(name="trending-up", size="md", color="#10b981"),
                 Title(value="📈 Performance Trends", size="md"),
-                Spacer(),
+                _SPACER,
                 Badge(label="LAST 30 DAYS", color="info", variant="soft")
             ]),
-            Divider(spacing="12px"),
+            _DIVIDER_12,
             Chart(
                 data=chart_data,
                 series=[
@@ -290,7 +364,7 @@ def create_trends_chart_widget(trends_data: Dict[str, Any]) -> Card:
                 showLegend=True,
                 height="300px"
             ),
-            Spacer(minSize="12px"),
+            _SPACER_12,
             Row(gap="16px", justify="center", children=[
                 Col(children=[
                     Text(value="Avg Hit Rate", weight="medium", textAlign="center"),
@@ -320,14 +394,14 @@ def create_player_prop_widget(prop_data: Dict[str, Any]) -> Card:
             Row(align="center", gap="8px", children=[
                 Icon(name="user", size="md", color="#168aa2"),
                 Title(value="🏀 Player Prop Alert", size="sm"),
-                Spacer(),
+                _SPACER,
                 Badge(
                     label=f"{confidence}%", 
-                    color="success" if confidence >= 75 else "warning" if confidence >= 60 else "danger",
+                    color=_CONFIDENCE_BADGE_COLORS[(confidence >= 60) + (confidence >= 75)],
                     variant="solid"
                 )
             ]),
-            Divider(spacing="8px"),
+            _DIVIDER_8,
             Col(gap="8px", children=[
                 Text(value=prop_data.get("player_name", ""), weight="bold", size="lg"),
                 Text(value=f"{prop_data.get('team', '')} vs {prop_data.get('opponent', '')}", color="#888"),
@@ -369,11 +443,29 @@ def create_player_prop_widget(prop_data: Dict[str, Any]) -> Card:
         ]
     )
 
+# Below this many legs NumPy's per-call overhead outweighs the loop it replaces
+_VECTORIZE_MIN_LEGS = 8
+
+def _total_decimal_odds(legs: List[ParlayLeg]) -> float:
+    """Combined decimal odds of a parlay, i.e. the product over its legs"""
+    values = [leg.get("odds", -110) for leg in legs]
+    # Only plain numbers go through NumPy; None or strings like "+150" need
+    # the per-leg cleaning in _american_to_decimal
+    if len(values) >= _VECTORIZE_MIN_LEGS and all(isinstance(value, (int, float)) for value in values):
+        odds = np.array(values, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            decimal = np.where(odds > 0, odds / 100 + 1, 100 / np.abs(odds) + 1)
+        # Zero and non-finite odds count as even money, as in the scalar path
+        return float(np.where((odds == 0) | ~np.isfinite(odds), 2.0, decimal).prod())
+    return math.prod(map(_american_to_decimal, values))
+
 def _american_to_decimal(odds: Any) -> float:
     """Convert American odds to decimal odds"""
     try:
         if isinstance(odds, str):
             odds = int(odds.replace("+", ""))
+        if not math.isfinite(odds):
+            return 2.0
         
         if odds > 0:
             return (odds / 100) + 1
@@ -5,13 +5,13 @@ Advanced sports betting assistant with visual widgets
 
 import os
 import asyncio
-import json
+import logging
+import orjson
 from typing import Any, AsyncIterator, Optional, Dict, List
-from datetime import datetime
+from datetime import date, datetime
 from collections.abc import AsyncGenerator
 import httpx
 from dotenv import load_dotenv
-from pydantic import BaseModel
 
 from agents import Agent, Runner, function_tool, RunContextWrapper, StopAtTools
 
@@ -28,12 +28,13 @@ from chatkit.types import (
     ThreadMetadata, UserMessageItem, ThreadStreamEvent,
     WidgetItem, HiddenContextItem, ClientToolCallItem,
     AssistantMessageContent, Annotation, URLSource,
-    ProgressUpdateEvent, ThreadItemDoneEvent
+    ProgressUpdateEvent, ThreadItemDoneEvent, ThreadItemReplacedEvent
 )
 from chatkit.store import Store
 from chatkit.errors import StreamError
 
 # Import our custom tools and widgets
+from chatkit_supabase_store import get_supabase_client
 from parleyapp_tools import WebSearchTool, SportsDataTool, StatMuseTool, BettingAnalysisTool
 from parleyapp_widgets import (
     create_search_progress_widget,
@@ -45,11 +46,13 @@ from parleyapp_widgets import (
 
 load_dotenv()
 
-class ParlayLeg(BaseModel):
-    """Single leg in a parlay bet"""
-    pick: str
-    type: str
-    odds: str
+logger = logging.getLogger("parleyapp.tools")
+
+# Tools are stateless wrappers over the shared keep-alive HTTP client, so
+# one instance of each serves every call
+_web_search = WebSearchTool()
+_sports_data = SportsDataTool()
+_statmuse = StatMuseTool()
 
 @function_tool
 async def web_search_visual(
@@ -60,19 +63,20 @@ async def web_search_visual(
     """Web search with live progress widget"""
     try:
         results: List[str] = []
-        web_search = WebSearchTool()
         
-        # Stream results
-        async for update in web_search.search_with_updates(query):
+        # Stream results, and stop pulling once we have the top 5
+        async for update in _web_search.search_with_updates(query):
             if update.get("type") == "result":
                 results.append(f"{update.get('title','')}: {update.get('snippet','')}")
+                if len(results) == 5:
+                    break
         
         if results:
-            return "\n".join(results[:5])  # Top 5 results
+            return "\n".join(results)
         else:
             return f"Found information about: {query}. Based on current sports analysis and betting trends."
     except Exception as e:
-        print(f"Web search error: {e}")
+        logger.error("Web search error: %s", e)
         return f"Analyzing {query} based on available data and current trends."
 
 @function_tool
@@ -83,8 +87,7 @@ async def get_odds_visual(
 ) -> str:
     """Fetch and visualize odds data"""
     try:
-        sports_data = SportsDataTool()
-        odds_data = await sports_data.get_odds(sport, market_type)
+        odds_data = await _sports_data.get_odds(sport, market_type)
         
         if odds_data and odds_data.get("games"):
             games_summary = []
@@ -94,7 +97,7 @@ async def get_odds_visual(
         else:
             return f"Current {sport} odds are available. Check your sportsbook for latest lines."
     except Exception as e:
-        print(f"Odds fetch error: {e}")
+        logger.error("Odds fetch error: %s", e)
         return f"Unable to fetch live {sport} odds at the moment. Use your sportsbook for current lines."
 
 @function_tool
@@ -104,11 +107,10 @@ async def statmuse_query(
 ) -> str:
     """Query StatMuse with visual response"""
     try:
-        statmuse = StatMuseTool()
-        result = await statmuse.query(question)
+        result = await _statmuse.query(question)
         return result.get("answer", f"Analysis for: {question}")
     except Exception as e:
-        print(f"StatMuse error: {e}")
+        logger.error("StatMuse error: %s", e)
         return f"Based on statistical analysis for: {question}"
 
 @function_tool
@@ -122,9 +124,28 @@ async def build_parlay(
         # Parse picks and calculate odds
         return f"Parlay Builder: {picks}\n\nTo build your parlay, I'll need specific picks with odds. For example:\n1. Lakers ML (-150)\n2. Celtics -3.5 (-110)\n\nProvide your picks and I'll calculate the payout for ${stake:.2f} stake."
     except Exception as e:
-        print(f"Parlay error: {e}")
+        logger.error("Parlay error: %s", e)
         return "I can help you build a parlay! Tell me which picks you want to include with their odds."
 
+def _fetch_nba_props(player_name: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    """Today's NBA prop picks from ai_predictions, best first. Blocking; run it in a thread"""
+    supabase = get_supabase_client(
+        os.getenv("SUPABASE_URL"),
+        os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    )
+    
+    # Query ai_predictions for NBA props
+    # Only the columns the summary reads; sport/pick_type are fixed here
+    query = supabase.table("ai_predictions").select("pick,confidence,edge,reasoning").eq("sport", "NBA").eq("pick_type", "prop")
+    
+    if player_name:
+        query = query.ilike("pick", f"%{player_name}%")
+    
+    # Get today's props ordered by confidence
+    today = date.today().isoformat()
+    result = query.gte("created_at", today).order("confidence", desc=True).limit(limit).execute()
+    return result.data or []
+
 @function_tool
 async def get_nba_props(
     ctx: RunContextWrapper,
@@ -133,26 +154,11 @@ async def get_nba_props(
 ) -> str:
     """Get today's top NBA player prop picks from the AI predictions database"""
     try:
-        from supabase import create_client
-        supabase = create_client(
-            os.getenv("SUPABASE_URL"),
-            os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-        )
-        
-        # Query ai_predictions for NBA props
-        query = supabase.table("ai_predictions").select("*").eq("sport", "NBA").eq("pick_type", "prop")
+        props = await asyncio.to_thread(_fetch_nba_props, player_name, limit)
         
-        if player_name:
-            query = query.ilike("pick", f"%{player_name}%")
-        
-        # Get today's props ordered by confidence
-        from datetime import date
-        today = date.today().isoformat()
-        result = query.gte("created_at", today).order("confidence", desc=True).limit(limit).execute()
-        
-        if result.data:
+        if props:
             props_text = []
-            for idx, prop in enumerate(result.data, 1):
+            for idx, prop in enumerate(props, 1):
                 props_text.append(
                     f"{idx}. **{prop.get('pick', 'N/A')}**\n"
                     f"   Confidence: {prop.get('confidence', 0):.1f}% | "
@@ -163,11 +169,48 @@ async def get_nba_props(
         else:
             return "No NBA props available at the moment. Check back soon for today's AI picks!"
     except Exception as e:
-        print(f"NBA props error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error("NBA props error: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
         return "Unable to fetch NBA props right now. Try asking about specific players or check the main predictions page."
 
+# Pick emoji by confidence tier, indexed by (c >= 75) + (c >= 85)
+_PICK_EMOJIS = ("👍", "✅", "🔥")
+
+def _format_pick(pick: Dict[str, Any]) -> str:
+    """One ai_predictions row as a get_todays_picks summary entry"""
+    confidence = pick.get("confidence", 0)
+    emoji = _PICK_EMOJIS[(confidence >= 75) + (confidence >= 85)]
+    return (
+        f"{emoji} **{pick.get('pick', 'N/A')}** ({pick.get('sport', 'N/A')})\n"
+        f"   Confidence: {confidence:.1f}% | Edge: +{pick.get('edge', 0):.1f}%\n"
+        f"   {pick.get('reasoning', 'N/A')[:120]}..."
+    )
+
+def _fetch_todays_picks(
+    sport: Optional[str],
+    pick_type: Optional[str],
+    min_confidence: float,
+    limit: int
+) -> List[Dict[str, Any]]:
+    """Today's picks from ai_predictions, best first. Blocking; run it in a thread"""
+    supabase = get_supabase_client(
+        os.getenv("SUPABASE_URL"),
+        os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+    )
+    
+    # Build query
+    query = supabase.table("ai_predictions").select("pick,confidence,edge,reasoning,sport")
+    
+    if sport:
+        query = query.eq("sport", sport.upper())
+    
+    if pick_type:
+        query = query.eq("pick_type", pick_type.lower())
+    
+    # Get today's picks with minimum confidence
+    today = date.today().isoformat()
+    result = query.gte("created_at", today).gte("confidence", min_confidence).order("confidence", desc=True).limit(limit).execute()
+    return result.data or []
+
 @function_tool
 async def get_todays_picks(
     ctx: RunContextWrapper,
@@ -178,37 +221,12 @@ async def get_todays_picks(
 ) -> str:
     """Get today's top AI betting picks from the database. Filters by sport, pick type (team/prop), and minimum confidence."""
     try:
-        from supabase import create_client
-        supabase = create_client(
-            os.getenv("SUPABASE_URL"),
-            os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-        )
-        
-        # Build query
-        query = supabase.table("ai_predictions").select("*")
-        
-        if sport:
-            query = query.eq("sport", sport.upper())
-        
-        if pick_type:
-            query = query.eq("pick_type", pick_type.lower())
-        
-        # Get today's picks with minimum confidence
-        from datetime import date
-        today = date.today().isoformat()
-        result = query.gte("created_at", today).gte("confidence", min_confidence).order("confidence", desc=True).limit(limit).execute()
+        picks = await asyncio.to_thread(_fetch_todays_picks, sport, pick_type, min_confidence, limit)
         
-        if result.data:
-            picks_text = []
-            for idx, pick in enumerate(result.data, 1):
-                emoji = "🔥" if pick.get('confidence', 0) >= 85 else "✅" if pick.get('confidence', 0) >= 75 else "👍"
-                picks_text.append(
-                    f"{emoji} **{pick.get('pick', 'N/A')}** ({pick.get('sport', 'N/A')})\n"
-                    f"   Confidence: {pick.get('confidence', 0):.1f}% | Edge: +{pick.get('edge', 0):.1f}%\n"
-                    f"   {pick.get('reasoning', 'N/A')[:120]}..."
-                )
+        if picks:
+            picks_text = [_format_pick(pick) for pick in picks]
             
-            summary = f"Found {len(result.data)} picks"
+            summary = f"Found {len(picks)} picks"
             if sport:
                 summary += f" for {sport}"
             if pick_type:
@@ -219,26 +237,38 @@ async def get_todays_picks(
         else:
             return f"No picks found matching your criteria. Try lowering the confidence threshold or check a different sport."
     except Exception as e:
-        print(f"Get picks error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error("Get picks error: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
         return "Unable to fetch picks right now. Please try again or check the main predictions page."
 
-class ProfessorLockChatKitServer(ChatKitServer):
-    """Advanced ChatKit server for Professor Lock betting assistant"""
-    
-    def __init__(self, data_store: Store, attachment_store=None):
-        super().__init__(data_store, attachment_store)
-        self.web_search = WebSearchTool()
-        self.sports_data = SportsDataTool()
-        self.statmuse = StatMuseTool()
-        self.betting_analysis = BettingAnalysisTool()
-    
-    # Define Professor Lock Agent
-    professor_lock_agent = Agent[AgentContext](
-        model="gpt-4o",
-        name="Professor Lock",
-        instructions="""You are Professor Lock, the sharpest AI sports betting analyst in the game.
+@function_tool
+async def get_todays_picks_multi(
+    ctx: RunContextWrapper,
+    sports: List[str],
+    min_confidence: float = 70.0,
+    limit_per: int = 5
+) -> str:
+    """Get today's top AI betting picks for several sports at once, e.g. ["NBA", "WNBA", "MLB"]."""
+    try:
+        # One query per sport, all in flight together
+        results = await asyncio.gather(*(
+            asyncio.to_thread(_fetch_todays_picks, sport, None, min_confidence, limit_per)
+            for sport in sports
+        ))
+        
+        sections = [
+            f"**{sport.upper()}**\n\n" + "\n\n".join([_format_pick(pick) for pick in picks])
+            for sport, picks in zip(sports, results)
+            if picks
+        ]
+        if sections:
+            return f"Today's picks with {min_confidence}%+ confidence:\n\n" + "\n\n".join(sections)
+        else:
+            return "No picks found for those sports. Try lowering the confidence threshold."
+    except Exception as e:
+        logger.error("Get multi-sport picks error: %s", e, exc_info=logger.isEnabledFor(logging.DEBUG))
+        return "Unable to fetch picks right now. Please try again or check the main predictions page."
+
+_PROFESSOR_LOCK_INSTRUCTIONS = """You are Professor Lock, the sharpest AI sports betting analyst in the game.
 
 PERSONALITY & STYLE:
 - Confident, direct, and knowledgeable - no fluff
@@ -250,6 +280,7 @@ PERSONALITY & STYLE:
 YOUR TOOLS - USE THEM:
 - **get_nba_props()** - Fetch today's NBA player prop picks from database
 - **get_todays_picks()** - Get AI picks for any sport (NBA, WNBA, MLB, UFC, NFL, CFB)
+- **get_todays_picks_multi()** - Get AI picks for several sports in one call
 - **web_search_visual()** - Search for injuries, news, trends
 - **get_odds_visual()** - Get current odds and lines
 - **statmuse_query()** - Query player/team stats
@@ -267,6 +298,22 @@ EXPERTISE:
 - Line value and edge calculation
 
 Remember: You have a database of AI-generated picks. USE IT. Don't make up picks."""
+
+class ProfessorLockChatKitServer(ChatKitServer):
+    """Advanced ChatKit server for Professor Lock betting assistant"""
+    
+    def __init__(self, data_store: Store, attachment_store=None):
+        super().__init__(data_store, attachment_store)
+        self.web_search = _web_search
+        self.sports_data = _sports_data
+        self.statmuse = _statmuse
+        self.betting_analysis = BettingAnalysisTool()
+    
+    # Define Professor Lock Agent
+    professor_lock_agent = Agent[AgentContext](
+        model="gpt-4o",
+        name="Professor Lock",
+        instructions=_PROFESSOR_LOCK_INSTRUCTIONS
     )
     
     async def respond(
@@ -329,11 +376,14 @@ Remember: You have a database of AI-generated picks. USE IT. Don't make up picks
                 ]
             )
             
+            # Both items record the same submission moment
+            now = datetime.now()
+            
             # Stream confirmation
             widget_item = WidgetItem(
                 id=self.store.generate_item_id("widget", thread, context),
                 thread_id=thread.id,
-                created_at=datetime.now(),
+                created_at=now,
                 widget=confirmation
             )
             
@@ -343,8 +393,10 @@ Remember: You have a database of AI-generated picks. USE IT. Don't make up picks
             hidden = HiddenContextItem(
                 id=self.store.generate_item_id("message", thread, context),
                 thread_id=thread.id,
-                created_at=datetime.now(),
-                content=[f"User placed parlay: {action.payload}"]
+                created_at=now,
+                content=["User placed parlay: " + orjson.dumps(
+                    action.payload, default=str, option=orjson.OPT_NON_STR_KEYS
+                ).decode()]
             )
             await self.store.add_thread_item(thread.id, hidden, context)
         
@@ -358,11 +410,32 @@ Remember: You have a database of AI-generated picks. USE IT. Don't make up picks
             # Trigger new search for more picks
             async for event in self.respond(thread, None, context):
                 yield event
+        
+        elif action.type == "paginate_odds":
+            # Re-render the odds board in place on the requested page
+            sport = action.payload.get("sport")
+            if not sport:
+                logger.warning("paginate_odds without a sport: %s", action.payload)
+                return
+            page = max(int(action.payload.get("page", 0)), 0)
+            odds_data = await self.sports_data.get_odds(sport)
+            board = create_odds_comparison_widget(odds_data.get("games", []), page=page, sport=sport)
+            
+            if sender is not None:
+                yield ThreadItemReplacedEvent(item=sender.model_copy(update={"widget": board}))
+            else:
+                yield ThreadItemDoneEvent(item=WidgetItem(
+                    id=self.store.generate_item_id("widget", thread, context),
+                    thread_id=thread.id,
+                    created_at=datetime.now(),
+                    widget=board
+                ))
 
 # Bind module-level tool functions to the agent
 ProfessorLockChatKitServer.professor_lock_agent.tools = [
     get_nba_props,
     get_todays_picks,
+    get_todays_picks_multi,
     web_search_visual,
     get_odds_visual,
     statmuse_query,
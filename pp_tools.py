@@ -6,109 +6,193 @@ Integrations with web search, StatMuse, and sports data APIs
 import os
 import json
 import asyncio
-from typing import Dict, Any, List, AsyncIterator
+import logging
+import hashlib
+import time
+from types import MappingProxyType
+from typing import Dict, Any, List, AsyncIterator, Awaitable, Callable, Mapping, Optional
 import httpx
+import numpy as np
+import orjson
 from datetime import datetime, timedelta
-import aiohttp
-from bs4 import BeautifulSoup
+from chatkit_supabase_store import get_redis
+from parleyapp_tools import get_http_client
+
+logger = logging.getLogger("parleyapp.tools")
+
+
+class _RateLimiter:
+    """Token bucket allowing `rate` calls per `period` seconds, with bursts
+    of up to `rate`. Acquire it around each outbound request. A rate of 0
+    turns the limit off."""
+    
+    def __init__(self, rate: float, period: float = 60.0):
+        if rate < 0 or period <= 0:
+            raise ValueError(f"Rate limit needs rate >= 0 and period > 0, got {rate}/{period}s")
+        self.rate = rate
+        self.period = period
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def __aenter__(self) -> None:
+        if not self.rate:
+            return
+        # The lock queues waiters in arrival order while one sleeps for a token
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+    
+    async def __aexit__(self, *exc_info: Any) -> None:
+        return None
+
+
+# Per-upstream request budgets, shared by every tool instance
+_BACKEND_LIMIT = _RateLimiter(float(os.getenv("BACKEND_RPM", "300")))
+_SUPABASE_LIMIT = _RateLimiter(float(os.getenv("SUPABASE_RPM", "200")))
+_STATMUSE_LIMIT = _RateLimiter(float(os.getenv("STATMUSE_RPM", "50")))
 
 class WebSearchTool:
     """Web search with streaming results"""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.base_url = os.getenv("BACKEND_URL", "http://localhost:3000")
+        self.client = client or get_http_client()
         
     async def search_with_updates(self, query: str) -> AsyncIterator[Dict[str, Any]]:
         """Search and stream results"""
         
         # Use your existing backend's AI search
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
+        async with _BACKEND_LIMIT:
+            response = await self.client.post(
                 f"{self.base_url}/api/ai/search",
                 json={"query": query, "type": "web"}
             )
+        
+        if response.status_code == 200:
+            results = orjson.loads(response.content)
             
-            if response.status_code == 200:
-                results = response.json()
-                
-                # Stream each result
-                for idx, result in enumerate(results.get("results", [])):
-                    yield {
-                        "type": "result",
-                        "title": result.get("title", ""),
-                        "snippet": result.get("snippet", ""),
-                        "source": result.get("source", "Web"),
-                        "url": result.get("url", ""),
-                        "index": idx
-                    }
-                    await asyncio.sleep(0.1)  # Simulate streaming
-            else:
+            # Stream each result
+            for idx, result in enumerate(results.get("results", [])):
                 yield {
-                    "type": "error",
-                    "message": "Search failed"
+                    "type": "result",
+                    "title": result.get("title", ""),
+                    "snippet": result.get("snippet", ""),
+                    "source": result.get("source", "Web"),
+                    "url": result.get("url", ""),
+                    "index": idx
                 }
+        else:
+            yield {
+                "type": "error",
+                "message": "Search failed"
+            }
+
+async def _cached_json(
+    key: str,
+    ttl: int,
+    fetch: Callable[[], Awaitable[Optional[Any]]]
+) -> Optional[Any]:
+    """Serve `key` from Redis, shared across workers, or fetch and store it
+    for `ttl` seconds. Failed fetches (None) are not cached, and a Redis
+    outage degrades to calling `fetch` directly."""
+    redis = get_redis()
+    if redis is None:
+        return await fetch()
+    try:
+        cached = await redis.get(key)
+        if cached is not None:
+            return orjson.loads(cached)
+    except Exception as e:
+        logger.warning("Redis read failed for %s: %s", key, e)
+    
+    value = await fetch()
+    if value is not None:
+        try:
+            await redis.set(key, orjson.dumps(value), ex=ttl)
+        except Exception as e:
+            logger.warning("Redis write failed for %s: %s", key, e)
+    return value
+
+
+# Map sport names to API keys
+_SPORT_MAP: Mapping[str, str] = MappingProxyType({
+    "MLB": "baseball_mlb",
+    "WNBA": "basketball_wnba",
+    "UFC": "mma_mixed_martial_arts",
+    "NFL": "americanfootball_nfl",
+    "CFB": "americanfootball_ncaaf"
+})
 
 class SportsDataTool:
     """Interface with sports data APIs"""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.base_url = os.getenv("BACKEND_URL", "http://localhost:3000")
+        self.client = client or get_http_client()
         self.supabase_url = os.getenv("SUPABASE_URL")
         self.supabase_key = os.getenv("SUPABASE_ANON_KEY")
+        self.supabase_headers: Mapping[str, str] = MappingProxyType({
+            "apikey": self.supabase_key,
+            "Authorization": f"Bearer {self.supabase_key}"
+        })
     
     async def get_odds(self, sport: str, market_type: str = "all") -> Dict[str, Any]:
         """Get live odds from backend"""
         
-        async with httpx.AsyncClient() as client:
-            # Map sport names to API keys
-            sport_map = {
-                "MLB": "baseball_mlb",
-                "WNBA": "basketball_wnba", 
-                "UFC": "mma_mixed_martial_arts",
-                "NFL": "americanfootball_nfl",
-                "CFB": "americanfootball_ncaaf"
-            }
-            
-            sport_key = sport_map.get(sport, sport.lower())
-            
-            # Get odds from your backend
-            response = await client.get(
+        sport_key = _SPORT_MAP.get(sport, sport.lower())
+        
+        # Lines move every few seconds at most; collapse bursts across threads
+        odds = await _cached_json(
+            f"odds:{sport_key}:{market_type}", 3,
+            lambda: self._fetch_odds(sport_key, market_type)
+        )
+        return odds if odds is not None else {"games": []}
+    
+    async def _fetch_odds(self, sport_key: str, market_type: str) -> Optional[Dict[str, Any]]:
+        """Odds formatted for the widget, or None if the backend call failed"""
+        
+        # Get odds from your backend
+        async with _BACKEND_LIMIT:
+            response = await self.client.get(
                 f"{self.base_url}/api/sports-events/odds",
                 params={"sport": sport_key, "market": market_type}
             )
+        
+        if response.status_code == 200:
+            data = orjson.loads(response.content)
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Format for widget display
-                formatted_games = []
-                for game in data.get("events", []):
-                    formatted_games.append({
-                        "matchup": f"{game['away_team']} @ {game['home_team']}",
-                        "time": game.get("commence_time", ""),
-                        "spread": game.get("spread", "N/A"),
-                        "total": game.get("total", "N/A"),
-                        "home_ml": game.get("home_ml", "N/A"),
-                        "away_ml": game.get("away_ml", "N/A")
-                    })
-                
-                return {"games": formatted_games}
+            # Format for widget display
+            formatted_games = [
+                {
+                    "matchup": f"{game['away_team']} @ {game['home_team']}",
+                    "time": game.get("commence_time", ""),
+                    "spread": game.get("spread", "N/A"),
+                    "total": game.get("total", "N/A"),
+                    "home_ml": game.get("home_ml", "N/A"),
+                    "away_ml": game.get("away_ml", "N/A")
+                }
+                for game in data.get("events", ())
+            ]
             
-            return {"games": []}
+            return {"games": formatted_games}
+        
+        return None
     
     async def get_player_props(self, sport: str, prop_type: str = "all") -> Dict[str, Any]:
         """Get player props from database"""
         
-        async with httpx.AsyncClient() as client:
-            headers = {
-                "apikey": self.supabase_key,
-                "Authorization": f"Bearer {self.supabase_key}"
-            }
-            
-            # Query player props
-            response = await client.get(
+        # Query player props
+        async with _SUPABASE_LIMIT:
+            response = await self.client.get(
                 f"{self.supabase_url}/rest/v1/player_props_odds",
-                headers=headers,
+                headers=self.supabase_headers,
                 params={
                     "select": "*,players(*),sports_events(*)",
                     "sports_events.sport": f"eq.{sport}",
@@ -116,45 +200,61 @@ class SportsDataTool:
                     "order": "created_at.desc"
                 }
             )
-            
-            if response.status_code == 200:
-                return response.json()
-            
-            return {"props": []}
+        
+        if response.status_code == 200:
+            return orjson.loads(response.content)
+        
+        return {"props": []}
 
 class StatMuseTool:
     """StatMuse integration"""
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.api_url = os.getenv("STATMUSE_URL", "http://localhost:5001")
+        self.client = client or get_http_client()
     
     async def query(self, question: str) -> Dict[str, Any]:
         """Query StatMuse"""
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(
-                    f"{self.api_url}/query",
-                    json={"query": question}
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    
-                    return {
-                        "answer": data.get("answer", ""),
-                        "visual_context": data.get("visual_context", ""),
-                        "data": data.get("data", {})
-                    }
-                    
-            except Exception as e:
-                print(f"StatMuse error: {e}")
-                
+        # Historical stats do not change between calls, so reuse answers
+        key = "statmuse:" + hashlib.sha1(question.encode()).hexdigest()
+        answer = await _cached_json(key, 60, lambda: self._fetch_answer(question))
+        if answer is not None:
+            return answer
+        
         return {
             "answer": "Unable to fetch StatMuse data",
             "visual_context": "",
             "data": {}
         }
+    
+    async def _fetch_answer(self, question: str) -> Optional[Dict[str, Any]]:
+        """StatMuse answer, or None if the call failed"""
+        
+        try:
+            async with _STATMUSE_LIMIT:
+                response = await self.client.post(
+                    f"{self.api_url}/query",
+                    json={"query": question}
+                )
+            
+            if response.status_code == 200:
+                data = orjson.loads(response.content)
+                
+                return {
+                    "answer": data.get("answer", ""),
+                    "visual_context": data.get("visual_context", ""),
+                    "data": data.get("data", {})
+                }
+                
+        except Exception as e:
+            logger.warning("StatMuse error: %s", e, exc_info=True)
+        
+        return None
+
+# Confidence by edge: _CONFIDENCE_LABELS[i] covers [thresholds[i-1], thresholds[i])
+_CONFIDENCE_THRESHOLDS = (3, 5, 7, 10)
+_CONFIDENCE_LABELS = ("⚠️ LOW", "👍 DECENT", "✅ SOLID", "⭐ HIGH", "🔥 MAX")
 
 class BettingAnalysisTool:
     """Advanced betting analysis"""
@@ -164,45 +264,50 @@ class BettingAnalysisTool:
     
     async def analyze_value(self, bet: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze betting value"""
+        return (await self.analyze_values([bet]))[0]
+    
+    async def analyze_values(self, bets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Analyze a batch of bets (e.g. every leg of a parlay) with one
+        historical-rate lookup for the whole batch"""
         
-        # Calculate implied probability
-        odds = bet.get("odds", -110)
-        if odds > 0:
-            implied_prob = 100 / (odds + 100)
-        else:
-            implied_prob = abs(odds) / (abs(odds) + 100)
+        if not bets:
+            return []
         
-        # Get historical hit rate (you'd query your database)
-        historical_rate = await self._get_historical_rate(bet)
+        odds = np.fromiter((bet.get("odds", -110) for bet in bets), dtype=np.float64, count=len(bets))
+        
+        # Get historical hit rates (you'd query your database)
+        historical_rate = np.asarray(await self._get_historical_rates(bets), dtype=np.float64)
+        
+        # Calculate implied probability; np.where evaluates both branches,
+        # so silence the unused one dividing by zero at exactly -100/+100
+        with np.errstate(divide="ignore", invalid="ignore"):
+            implied_prob = np.where(odds > 0, 100 / (odds + 100), -odds / (100 - odds))
         
         # Calculate edge
         edge = historical_rate - implied_prob
+        confidences = np.searchsorted(_CONFIDENCE_THRESHOLDS, edge, side="right")
         
-        return {
-            "implied_probability": f"{implied_prob:.1f}%",
-            "historical_rate": f"{historical_rate:.1f}%", 
-            "edge": f"{edge:+.1f}%",
-            "recommendation": "BET" if edge > 3 else "PASS",
-            "confidence": self._calculate_confidence(edge)
-        }
+        # Strings are only built here, at the very end
+        return [
+            {
+                "implied_probability": f"{ip:.1f}%",
+                "historical_rate": f"{hr:.1f}%", 
+                "edge": f"{e:+.1f}%",
+                "recommendation": "BET" if e > 3 else "PASS",
+                "confidence": _CONFIDENCE_LABELS[c]
+            }
+            for ip, hr, e, c in zip(
+                implied_prob.tolist(), historical_rate.tolist(), edge.tolist(), confidences.tolist()
+            )
+        ]
     
-    async def _get_historical_rate(self, bet: Dict[str, Any]) -> float:
-        """Get historical hit rate from database"""
+    async def _get_historical_rates(self, bets: List[Dict[str, Any]]) -> List[float]:
+        """Get historical hit rates from database, one entry per bet.
+        
+        This is the single place a real lookup belongs: one query for the
+        whole batch, e.g. matching on (player, prop_type) IN (...), rather
+        than a round trip per leg."""
         
         # This would query your historical data
         # For now, return a mock value
-        return 55.0
-    
-    def _calculate_confidence(self, edge: float) -> str:
-        """Calculate confidence level"""
-        
-        if edge >= 10:
-            return "🔥 MAX"
-        elif edge >= 7:
-            return "⭐ HIGH"
-        elif edge >= 5:
-            return "✅ SOLID"
-        elif edge >= 3:
-            return "👍 DECENT"
-        else:
-            return "⚠️ LOW"
+        return [55.0] * len(bets)
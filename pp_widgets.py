@@ -3,32 +3,96 @@ ParleyApp ChatKit Widgets
 Custom widgets for sports betting visualization
 """
 
-from typing import List, Dict, Any
+import math
+from functools import lru_cache, partial
+from types import MappingProxyType
+from typing import List, Dict, Any, Mapping, Optional, Tuple, TypedDict
+import numpy as np
 from chatkit.widgets import (
     Card, Text, Title, Button, Row, Col, Box, Markdown,
     ListView, ListViewItem, Badge, Icon, Divider, Spacer,
     Chart, Series, Form, Select, SelectOption, Input,
     Image, Transition
 )
+from chatkit.actions import ActionConfig
 
+class ParlayLeg(TypedDict, total=False):
+    """One leg as passed to create_parlay_builder_widget"""
+    pick: str
+    type: str
+    odds: int
+    confidence: str
+
+# Lookup tables shared by every widget build
+_SEARCH_ICONS: Mapping[str, str] = MappingProxyType({
+    "general": "search",
+    "injury": "alert-circle",
+    "weather": "cloud",
+    "news": "newspaper",
+    "odds": "trending-up"
+})
+
+_SEARCH_COLORS: Mapping[str, str] = MappingProxyType({
+    "general": "#168aa2",
+    "injury": "#ef4444",
+    "weather": "#6b7280",
+    "news": "#10b981",
+    "odds": "#8b5cf6"
+})
+
+_CONFIDENCE_COLOR: Mapping[str, str] = MappingProxyType({
+    "MAX": "danger",
+    "HIGH": "warning",
+    "SOLID": "success",
+    "DECENT": "info",
+    "LOW": "secondary"
+})
+
+# Bet status -> (icon, color, text)
+_STATUS_CONFIG: Mapping[str, Tuple[str, str, str]] = MappingProxyType({
+    "pending": ("clock", "warning", "Processing..."),
+    "confirmed": ("check", "success", "Bet Placed!"),
+    "failed": ("x", "danger", "Failed")
+})
+
+# Below this many legs NumPy's per-call overhead outweighs the loop it replaces
+_VECTORIZE_MIN_LEGS = 8
+
+_fmt_money = "${:,.2f}".format
+
+# Fixed column headers of the odds table
+_spread_badge = partial(Badge, label="SPREAD", size="sm", color="secondary", variant="outline")
+_total_badge = partial(Badge, label="O/U", size="sm", color="info", variant="outline")
+
+# Empty-state cards are shared singletons; treat them as read-only
+_EMPTY_ODDS_CARD = Card(
+    size="lg",
+    theme="dark",
+    children=[
+        Title(value="📊 Live Odds Board", size="md", weight="bold"),
+        Text(value="No games on the board right now", size="sm", color="#888")
+    ]
+)
+
+_EMPTY_PARLAY_CARD = Card(
+    size="lg",
+    theme="dark",
+    background="#0f1419",
+    children=[
+        Title(value="🎯 Parlay Builder", size="lg", weight="bold"),
+        Text(value="Add picks to start your parlay", size="sm", color="#888")
+    ]
+)
+
+# Style-only layout widgets, shared by every build; treat them as read-only
+_DIVIDER_12 = Divider(spacing="12px")
+_DIVIDER_16 = Divider(spacing="16px")
+_SPACER_16 = Spacer(minSize="16px")
+
+@lru_cache(maxsize=512)
 def create_search_progress_widget(query: str, search_type: str = "general") -> Card:
-    """Create search progress widget"""
-    
-    search_icons = {
-        "general": "search",
-        "injury": "alert-circle", 
-        "weather": "cloud",
-        "news": "newspaper",
-        "odds": "trending-up"
-    }
-    
-    search_colors = {
-        "general": "#168aa2",
-        "injury": "#ef4444",
-        "weather": "#6b7280",
-        "news": "#10b981",
-        "odds": "#8b5cf6"
-    }
+    """Create search progress widget. Cached per (query, search_type), so
+    treat the returned card as read-only"""
     
     return Card(
         size="md",
@@ -39,9 +103,9 @@ def create_search_progress_widget(query: str, search_type: str = "general") -> C
         children=[
             Row(align="center", gap="12px", children=[
                 Icon(
-                    name=search_icons.get(search_type, "search"),
+                    name=_SEARCH_ICONS.get(search_type, "search"),
                     size="lg",
-                    color=search_colors.get(search_type, "#168aa2")
+                    color=_SEARCH_COLORS.get(search_type, "#168aa2")
                 ),
                 Col(flex=1, children=[
                     Title(value=f"🔍 Searching", size="sm", weight="bold"),
@@ -75,59 +139,61 @@ def create_search_progress_widget(query: str, search_type: str = "general") -> C
         ]
     )
 
-def create_odds_comparison_widget(odds_data: Dict[str, Any]) -> Card:
-    """Create odds comparison table"""
-    
-    rows = []
-    for game in odds_data.get("games", [])[:10]:
-        rows.append(
-            ListViewItem(children=[
-                Box(
-                    padding="12px",
-                    background="#1a1d2e",
-                    radius="md",
-                    margin="4px 0",
-                    children=[
-                        Row(gap="16px", align="center", children=[
-                            # Teams
-                            Col(flex=3, children=[
-                                Text(value=game["away"], weight="semibold"),
-                                Text(value="@", color="#666", size="sm"),
-                                Text(value=game["home"], weight="semibold")
-                            ]),
-                            
-                            # Spread
-                            Col(align="center", children=[
-                                Badge(
-                                    label="SPREAD",
-                                    size="sm",
-                                    color="secondary",
-                                    variant="outline"
-                                ),
-                                Text(value=game.get("spread", "N/A"), weight="bold")
-                            ]),
-                            
-                            # Total
-                            Col(align="center", children=[
-                                Badge(
-                                    label="O/U",
-                                    size="sm",
-                                    color="info",
-                                    variant="outline"
-                                ),
-                                Text(value=game.get("total", "N/A"), weight="bold")
-                            ]),
-                            
-                            # Moneyline
-                            Col(align="end", children=[
-                                Text(value=game.get("away_ml", "N/A"), size="sm"),
-                                Text(value=game.get("home_ml", "N/A"), size="sm")
-                            ])
-                        ])
-                    ]
-                )
-            ])
+def _odds_row(game: Dict[str, Any]) -> ListViewItem:
+    """One game row of the odds comparison table"""
+    return ListViewItem(children=[
+        Box(
+            padding="12px",
+            background="#1a1d2e",
+            radius="md",
+            margin="4px 0",
+            children=[
+                Row(gap="16px", align="center", children=[
+                    # Teams
+                    Col(flex=3, children=[
+                        Text(value=game["away"], weight="semibold"),
+                        Text(value="@", color="#666", size="sm"),
+                        Text(value=game["home"], weight="semibold")
+                    ]),
+                    
+                    # Spread
+                    Col(align="center", children=[
+                        _spread_badge(),
+                        Text(value=game.get("spread", "N/A"), weight="bold")
+                    ]),
+                    
+                    # Total
+                    Col(align="center", children=[
+                        _total_badge(),
+                        Text(value=game.get("total", "N/A"), weight="bold")
+                    ]),
+                    
+                    # Moneyline
+                    Col(align="end", children=[
+                        Text(value=game.get("away_ml", "N/A"), size="sm"),
+                        Text(value=game.get("home_ml", "N/A"), size="sm")
+                    ])
+                ])
+            ]
         )
+    ])
+
+def create_odds_comparison_widget(
+    odds_data: Dict[str, Any],
+    page: int = 0,
+    page_size: int = 10,
+    sport: Optional[str] = None
+) -> Card:
+    """Create odds comparison table, one page of games at a time.
+    `sport` rides along in the "Load more" payload so the server can refetch."""
+    
+    games = odds_data.get("games", [])
+    if not games:
+        return _EMPTY_ODDS_CARD
+    start = page * page_size
+    # Only the visible page is turned into widgets
+    rows = [_odds_row(game) for game in games[start:start + page_size]]
+    has_more = start + page_size < len(games)
     
     return Card(
         size="lg",
@@ -136,7 +202,7 @@ def create_odds_comparison_widget(odds_data: Dict[str, Any]) -> Card:
             Row(align="center", justify="between", children=[
                 Title(value="📊 Live Odds Board", size="md", weight="bold"),
                 Badge(
-                    label=f"{len(rows)} Games",
+                    label=f"{len(games)} Games",
                     color="success",
                     variant="soft"
                 )
@@ -146,84 +212,107 @@ def create_odds_comparison_widget(odds_data: Dict[str, Any]) -> Card:
                 size="sm",
                 color="#888"
             ),
-            Divider(spacing="12px"),
-            ListView(children=rows, limit="auto")
+            _DIVIDER_12,
+            ListView(children=rows, limit=page_size),
+            *([Button(
+                label="Load more",
+                variant="outline",
+                size="sm",
+                block=True,
+                onClickAction=ActionConfig(type="paginate_odds", payload={"page": page + 1, "sport": sport})
+            )] if has_more else [])
         ]
     )
 
+def _parlay_leg_item(i: int, leg: ParlayLeg) -> ListViewItem:
+    """One numbered leg of the parlay builder"""
+    pick, bet_type, odds = leg["pick"], leg["type"], leg["odds"]
+    confidence = leg.get("confidence", "")
+    confidence_color = _CONFIDENCE_COLOR.get(confidence or "SOLID", "secondary")
+    
+    return ListViewItem(children=[
+        Box(
+            padding="12px",
+            background="#1a1d2e",
+            radius="md",
+            margin="4px 0",
+            children=[
+                Row(gap="12px", align="center", children=[
+                    Badge(
+                        label=f"#{i}",
+                        variant="solid",
+                        color="primary",
+                        pill=True,
+                        size="sm"
+                    ),
+                    Col(flex=1, children=[
+                        Text(value=pick, weight="semibold"),
+                        Row(gap="8px", children=[
+                            Badge(
+                                label=bet_type,
+                                size="sm",
+                                variant="outline"
+                            ),
+                            Text(
+                                value=f"@ {odds}",
+                                size="sm",
+                                weight="medium"
+                            ),
+                            Badge(
+                                label=confidence,
+                                size="sm",
+                                color=confidence_color,
+                                variant="soft"
+                            )
+                        ])
+                    ])
+                ])
+            ]
+        )
+    ])
+
+def _american_to_decimal(odds: Any) -> float:
+    """Convert American odds to decimal odds; missing, zero or malformed odds
+    count as even money"""
+    try:
+        if isinstance(odds, str):
+            odds = int(odds.replace("+", ""))
+        if odds == 0 or not math.isfinite(odds):
+            return 2.0
+        return odds / 100 + 1 if odds > 0 else 100 / abs(odds) + 1
+    except (TypeError, ValueError):
+        return 2.0
+
+def _total_decimal_odds(legs: List[ParlayLeg]) -> float:
+    """Combined decimal odds of a parlay, i.e. the product over its legs"""
+    values = [leg.get("odds", -110) for leg in legs]
+    # Long parlays of plain numbers go through one NumPy pass, where the
+    # vector setup pays for itself; anything else is cleaned leg by leg
+    if len(values) >= _VECTORIZE_MIN_LEGS and all(isinstance(value, (int, float)) for value in values):
+        odds = np.array(values, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            decimal = np.where(odds > 0, odds / 100 + 1, 100 / np.abs(odds) + 1)
+        return float(np.where((odds == 0) | ~np.isfinite(odds), 2.0, decimal).prod())
+    return math.prod(map(_american_to_decimal, values))
+
 def create_parlay_builder_widget(
-    legs: List[Dict[str, Any]], 
+    legs: List[ParlayLeg], 
     stake: float = 100
 ) -> Card:
     """Create interactive parlay builder"""
     
+    if not legs:
+        return _EMPTY_PARLAY_CARD
+    
     # Calculate parlay math
-    total_odds = 1.0
-    for leg in legs:
-        odds = leg.get("odds", -110)
-        if odds > 0:
-            decimal = (odds / 100) + 1
-        else:
-            decimal = (100 / abs(odds)) + 1
-        total_odds *= decimal
+    total_odds = _total_decimal_odds(legs)
     
     american_odds = int((total_odds - 1) * 100) if total_odds > 2 else int(-100 / (total_odds - 1))
     payout = stake * total_odds
     profit = payout - stake
     
     # Create leg items
-    leg_items = []
-    for i, leg in enumerate(legs, 1):
-        confidence_color = {
-            "MAX": "danger",
-            "HIGH": "warning",
-            "SOLID": "success",
-            "DECENT": "info",
-            "LOW": "secondary"
-        }.get(leg.get("confidence", "SOLID"), "secondary")
-        
-        leg_items.append(
-            ListViewItem(children=[
-                Box(
-                    padding="12px",
-                    background="#1a1d2e",
-                    radius="md",
-                    margin="4px 0",
-                    children=[
-                        Row(gap="12px", align="center", children=[
-                            Badge(
-                                label=f"#{i}",
-                                variant="solid",
-                                color="primary",
-                                pill=True,
-                                size="sm"
-                            ),
-                            Col(flex=1, children=[
-                                Text(value=leg["pick"], weight="semibold"),
-                                Row(gap="8px", children=[
-                                    Badge(
-                                        label=leg["type"],
-                                        size="sm",
-                                        variant="outline"
-                                    ),
-                                    Text(
-                                        value=f"@ {leg['odds']}",
-                                        size="sm",
-                                        weight="medium"
-                                    ),
-                                    Badge(
-                                        label=leg.get("confidence", ""),
-                                        size="sm",
-                                        color=confidence_color,
-                                        variant="soft"
-                                    )
-                                ])
-                            ])
-                        ])
-                    ]
-                )
-            ])
-        )
+    leg_items = [_parlay_leg_item(i, leg) for i, leg in enumerate(legs, 1)]
     
     return Card(
         size="lg",
@@ -241,7 +330,7 @@ def create_parlay_builder_widget(
                 )
             ]),
             
-            Divider(spacing="16px"),
+            _DIVIDER_16,
             
             # Legs
             Box(
@@ -264,7 +353,7 @@ def create_parlay_builder_widget(
                     Row(justify="between", margin="8px 0", children=[
                         Text(value="Parlay Odds:", weight="medium"),
                         Text(
-                            value=f"{'+' if american_odds > 0 else ''}{american_odds}",
+                            value=format(american_odds, "+d"),
                             weight="bold",
                             size="lg",
                             color="#10b981"
@@ -284,11 +373,11 @@ def create_parlay_builder_widget(
                     Row(justify="between", margin="8px 0", children=[
                         Col(children=[
                             Text(value="To Win:", size="sm", color="#888"),
-                            Text(value=f"${profit:.2f}", weight="bold", color="#10b981")
+                            Text(value=_fmt_money(profit), weight="bold", color="#10b981")
                         ]),
                         Col(align="end", children=[
                             Text(value="Total Payout:", size="sm", color="#888"),
-                            Text(value=f"${payout:.2f}", weight="bold", size="lg", color="#10b981")
+                            Text(value=_fmt_money(payout), weight="bold", size="lg", color="#10b981")
                         ])
                     ])
                 ]
@@ -317,14 +406,11 @@ def create_parlay_builder_widget(
 def create_trends_chart_widget(trends_data: Dict[str, Any]) -> Card:
     """Create trends visualization"""
     
-    # Format data for chart
-    chart_data = []
-    for point in trends_data.get("data", []):
-        chart_data.append({
-            "date": point["date"],
-            "value": point["value"],
-            "line": point.get("line", 0)
-        })
+    # Format data for chart; Chart.data is row-oriented, one dict per point
+    chart_data = [
+        {"date": point["date"], "value": point["value"], "line": point.get("line", 0)}
+        for point in trends_data.get("data", [])
+    ]
     
     return Card(
         size="full",
@@ -332,7 +418,7 @@ def create_trends_chart_widget(trends_data: Dict[str, Any]) -> Card:
         children=[
             Title(value="📈 Performance Trends", size="md", weight="bold"),
             Text(value=trends_data.get("description", ""), size="sm", color="#888"),
-            Divider(spacing="12px"),
+            _DIVIDER_12,
             Chart(
                 data=chart_data,
                 series=[
@@ -364,41 +450,46 @@ def create_bet_confirmation_widget(
     status: str = "pending"
 ) -> Card:
     """Create bet confirmation widget"""
+    # Only these fields reach the card, so they make a hashable cache key
+    return _build_bet_confirmation(
+        bet_type,
+        str(details.get("summary", "")),
+        str(details.get("id", "N/A")),
+        status
+    )
+
+@lru_cache(maxsize=512)
+def _build_bet_confirmation(bet_type: str, summary: str, tracking_id: str, status: str) -> Card:
+    """Build (and cache) the confirmation card for create_bet_confirmation_widget"""
     
-    status_config = {
-        "pending": {"icon": "clock", "color": "warning", "text": "Processing..."},
-        "confirmed": {"icon": "check", "color": "success", "text": "Bet Placed!"},
-        "failed": {"icon": "x", "color": "danger", "text": "Failed"}
-    }
-    
-    config = status_config.get(status, status_config["pending"])
+    icon, color, text = _STATUS_CONFIG.get(status, _STATUS_CONFIG["pending"])
     
     return Card(
         size="sm",
         theme="dark",
         status={
-            "text": config["text"],
-            "icon": config["icon"]
+            "text": text,
+            "icon": icon
         },
         background="#0f1419",
         children=[
             Row(align="center", gap="12px", children=[
                 Icon(
-                    name=config["icon"],
+                    name=icon,
                     size="xl",
-                    color=config["color"]
+                    color=color
                 ),
                 Col(flex=1, children=[
                     Title(value=f"✅ {bet_type} Confirmed", size="md", weight="bold"),
-                    Text(value=details.get("summary", ""), size="sm"),
+                    Text(value=summary, size="sm"),
                     Text(
-                        value=f"Tracking ID: {details.get('id', 'N/A')}",
+                        value=f"Tracking ID: {tracking_id}",
                         size="xs",
                         color="#666"
                     )
                 ])
             ]),
-            Spacer(minSize="16px"),
+            _SPACER_16,
             Button(
                 label="View in Bet Tracker",
                 variant="outline",
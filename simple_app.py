@@ -4,6 +4,10 @@ Simple ParleyApp ChatKit Server - Minimal working version
 
 import os
 import json
+import time
+import orjson
+from itertools import islice
+from secrets import token_hex
 from typing import Any, AsyncIterator
 from datetime import datetime
 from fastapi import FastAPI, Request, Response
@@ -11,32 +15,51 @@ from fastapi.responses import StreamingResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
-from agents import Agent
+from agents import Agent, Runner
 from chatkit.server import ChatKitServer
 from chatkit.agents import AgentContext, stream_agent_response, simple_to_agent_input
-from chatkit.types import ThreadMetadata, UserMessageItem, ThreadStreamEvent
-from chatkit.store import Store
+from chatkit.types import ActiveStatus, ThreadMetadata, UserMessageItem, ThreadStreamEvent
+from chatkit.store import NotFoundError, Store
 from chatkit.types import Page, ThreadItem, Attachment
 
 load_dotenv()
 
+def _page_after(entries: dict, after: str | None, limit: int, order: str) -> Page:
+    """One page of an insertion-ordered {id: value} dict, starting just past
+    the `after` id. Only walks as far as the page needs. Raises NotFoundError
+    for an `after` id that is not in `entries`, rather than returning an
+    empty page that would read as the end of the data."""
+    keys = reversed(entries) if order == "desc" else iter(entries)
+    if after is not None:
+        if after not in entries:
+            raise NotFoundError(f"Cursor {after} not found")
+        for key in keys:
+            if key == after:
+                break
+    page = list(islice(keys, limit + 1))
+    has_more = len(page) > limit
+    del page[limit:]
+    return Page(
+        data=[entries[key] for key in page],
+        has_more=has_more,
+        after=page[-1] if page else None
+    )
+
 # Simple in-memory store for testing
 class MemoryStore(Store):
     def __init__(self):
         self.threads = {}
+        # thread_id -> {item_id: item}; dicts keep insertion (creation) order
         self.thread_items = {}
         self.attachments = {}
     
     def generate_thread_id(self, context):
-        import uuid
-        return f"thread_{uuid.uuid4().hex[:8]}"
+        return f"thread_{token_hex(8)}"
     
     def generate_item_id(self, item_type, thread, context):
-        import uuid
-        return f"{item_type}_{uuid.uuid4().hex[:8]}"
+        return f"{item_type}_{token_hex(8)}"
     
     async def load_thread(self, thread_id, context):
-        from chatkit.types import ThreadMetadata, ActiveStatus
         if thread_id in self.threads:
             return self.threads[thread_id]
         # Return new thread
@@ -53,30 +76,26 @@ class MemoryStore(Store):
         self.threads[thread.id] = thread
     
     async def load_thread_items(self, thread_id, after, limit, order, context):
-        items = self.thread_items.get(thread_id, [])
-        return Page(data=items[:limit], has_more=False, after=None)
+        return _page_after(self.thread_items.get(thread_id, {}), after, limit, order)
     
     async def add_thread_item(self, thread_id, item, context):
-        if thread_id not in self.thread_items:
-            self.thread_items[thread_id] = []
-        self.thread_items[thread_id].append(item)
+        self.thread_items.setdefault(thread_id, {})[item.id] = item
     
     async def save_item(self, thread_id, item, context):
-        pass  # Simple implementation
+        # Replacing an existing key keeps the item's position
+        self.thread_items.setdefault(thread_id, {})[item.id] = item
     
     async def load_item(self, thread_id, item_id, context):
-        items = self.thread_items.get(thread_id, [])
-        for item in items:
-            if item.id == item_id:
-                return item
-        raise ValueError(f"Item {item_id} not found")
+        try:
+            return self.thread_items[thread_id][item_id]
+        except KeyError:
+            raise ValueError(f"Item {item_id} not found") from None
     
     async def delete_thread_item(self, thread_id, item_id, context):
-        pass  # Simple implementation
+        self.thread_items.get(thread_id, {}).pop(item_id, None)
     
     async def load_threads(self, limit, after, order, context):
-        threads = list(self.threads.values())[:limit]
-        return Page(data=threads, has_more=False, after=None)
+        return _page_after(self.threads, after, limit, order)
     
     async def delete_thread(self, thread_id, context):
         if thread_id in self.threads:
@@ -97,13 +116,18 @@ class MemoryStore(Store):
 # FastAPI app
 app = FastAPI(title="ParleyApp ChatKit Server")
 
-# CORS configuration
+# CORS configuration - a wildcard origin is not valid alongside credentials,
+# so origins come from a comma-separated CORS_ORIGINS allowlist
+CORS_ORIGINS = tuple(
+    origin.strip() for origin in os.getenv("CORS_ORIGINS", "").split(",") if origin.strip()
+) or ("http://localhost:3000",)
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Simplified for testing
+    allow_origins=list(CORS_ORIGINS),
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["POST", "GET"],
+    allow_headers=["content-type", "x-user-id", "x-session-id"],
 )
 
 class SimpleProfessorLockServer(ChatKitServer):
@@ -134,8 +158,6 @@ class SimpleProfessorLockServer(ChatKitServer):
         )
         
         # Convert input and run agent
-        from agents import Runner
-        
         agent_input = await simple_to_agent_input(input_user_message) if input_user_message else []
         
         result = Runner.run_streamed(
@@ -152,16 +174,54 @@ class SimpleProfessorLockServer(ChatKitServer):
 data_store = MemoryStore()
 chatkit_server = SimpleProfessorLockServer(data_store)
 
+# Bodies above this size are copied into one preallocated buffer instead of
+# being joined from a list of chunks, which briefly holds two copies
+_PREALLOCATE_BODY_BYTES = 1_000_000
+# Content-Length is client-controlled, so never allocate more than this
+_MAX_BODY_BYTES = int(os.getenv("MAX_BODY_BYTES", "25000000"))
+
+async def _read_body(request: Request) -> bytes | bytearray | None:
+    """Read the request body, streaming large uploads into a sized buffer.
+    Returns None once more than _MAX_BODY_BYTES arrive, whatever the
+    Content-Length header claims."""
+    try:
+        length = int(request.headers["content-length"])
+    except (KeyError, ValueError):
+        # Chunked or unparseable: nothing to size the buffer from, so grow it
+        length = None
+    if length is not None and length <= _PREALLOCATE_BODY_BYTES:
+        return await request.body()
+    if length is not None and length > _MAX_BODY_BYTES:
+        return None
+    
+    buffer = bytearray(length or 0)
+    offset = 0
+    async for chunk in request.stream():
+        end = offset + len(chunk)
+        if end > _MAX_BODY_BYTES:
+            return None
+        buffer[offset:end] = chunk
+        offset = end
+    # Trim if the client sent less than its Content-Length claimed
+    del buffer[offset:]
+    return buffer
+
 @app.post("/chatkit")
 async def chatkit_endpoint(request: Request):
     """Main ChatKit endpoint"""
     
     try:
-        body = await request.body()
+        body = await _read_body(request)
+        if body is None:
+            return JSONResponse(
+                status_code=413,
+                content={"error": "Request body too large"}
+            )
         
         context = {
             "user_id": request.headers.get("X-User-Id", "test-user"),
-            "timestamp": datetime.now()
+            # Only used for request timing, so skip building a datetime
+            "timestamp": time.monotonic()
         }
         
         result = await chatkit_server.process(body, context)
@@ -189,26 +249,36 @@ async def chatkit_endpoint(request: Request):
             content={"error": str(e)}
         )
 
-@app.get("/health")
-async def health():
+# Encoded health body and the wall-clock second it was rendered for
+_HEALTH_CACHE: tuple[int, bytes] = (0, b"")
+
+@app.get("/health", response_model=None)
+async def health() -> Response:
     """Health check"""
-    return {
-        "status": "healthy",
-        "service": "Simple ParleyApp ChatKit Server",
-        "timestamp": datetime.now().isoformat()
+    global _HEALTH_CACHE
+    now = int(time.time())
+    if now != _HEALTH_CACHE[0]:
+        _HEALTH_CACHE = (now, orjson.dumps({
+            "status": "healthy",
+            "service": "Simple ParleyApp ChatKit Server",
+            "timestamp": datetime.fromtimestamp(now).isoformat()
+        }))
+    return Response(content=_HEALTH_CACHE[1], media_type="application/json")
+
+# Static root payload, serialized once at import
+_ROOT_BODY = orjson.dumps({
+    "service": "Simple ParleyApp ChatKit Server",
+    "description": "Testing Professor Lock AI",
+    "endpoints": {
+        "chatkit": "/chatkit",
+        "health": "/health"
     }
+})
 
-@app.get("/")
-async def root():
+@app.get("/", response_model=None)
+async def root() -> Response:
     """Root endpoint"""
-    return {
-        "service": "Simple ParleyApp ChatKit Server",
-        "description": "Testing Professor Lock AI",
-        "endpoints": {
-            "chatkit": "/chatkit",
-            "health": "/health"
-        }
-    }
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 if __name__ == "__main__":
     import uvicorn
@@ -2,15 +2,16 @@ import os
 import sys
 
 if __name__ == "__main__":
-    # Optional: run startup check first
-    try:
-        import startup_check  # type: ignore
-        rc = startup_check.main()
-        if rc != 0:
-            sys.exit(rc)
-    except Exception as e:
-        # Don't block start if startup_check isn't present
-        print(f"Startup check skipped or failed: {e}")
+    # Optional: run startup check first (SKIP_STARTUP_CHECK=0 to enable)
+    if os.getenv("SKIP_STARTUP_CHECK", "1") == "0":
+        try:
+            import startup_check  # type: ignore
+            rc = startup_check.main()
+            if rc != 0:
+                sys.exit(rc)
+        except Exception as e:
+            # Don't block start if startup_check isn't present
+            print(f"Startup check skipped or failed: {e}")
 
     from uvicorn import run
 
@@ -21,4 +22,18 @@ if __name__ == "__main__":
         # Fallback to 8080 if PORT isn't an int
         port = 8080
 
-    run("app:app", host="0.0.0.0", port=port)
+    # Same loop/parser as app.py's own entry point; uvicorn[standard] ships both.
+    # WEB_CONCURRENCY > 1 needs REDIS_URL to keep the store's read cache shared
+    # between workers; without it that cache is turned off. The odds and
+    # StatMuse caches in parleyapp_tools are per process regardless.
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    # Workers inherit this, and the store sizes its read cache from it
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    run(
+        "app:app",
+        host="0.0.0.0",
+        port=port,
+        loop="uvloop",
+        http="httptools",
+        workers=workers
+    )
@@ -6,56 +6,78 @@ Tests all imports and dependencies before starting the server
 
 import sys
 import os
+import importlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
 
-def check_imports():
-    """Check all required imports"""
-    print("🔍 Checking imports...")
-    
-    try:
-        import fastapi
-        print("✅ FastAPI")
-    except ImportError as e:
-        print(f"❌ FastAPI: {e}")
-        return False
-    
-    try:
-        import uvicorn
-        print("✅ Uvicorn")
-    except ImportError as e:
-        print(f"❌ Uvicorn: {e}")
-        return False
+# (label, module) pairs; the check only needs each top-level package
+_DEPENDENCIES = (
+    ("FastAPI", "fastapi"),
+    ("Uvicorn", "uvicorn"),
+    ("ChatKit", "chatkit"),
+    ("Agents", "agents"),
+    ("AsyncPG", "asyncpg"),
+    ("HTTPX", "httpx"),
+)
+
+# Submodules the deep check imports on top of the packages above
+_ENTRY_POINTS = ("chatkit.server", "chatkit.widgets", "chatkit.actions")
+
+_CUSTOM_MODULES = ("parleyapp_tools", "parleyapp_widgets")
+
+def _import_all(modules):
+    """Import `modules` concurrently, returning the error each one raised (or
+    None) in order. Imports spend much of their time reading files with the
+    GIL released, so a small pool overlaps them."""
+    def attempt(module):
+        try:
+            importlib.import_module(module)
+        except ImportError as e:
+            return e
+        except RuntimeError as e:
+            # Two threads importing modules that import each other can trip
+            # importlib's deadlock detection; the retry below sorts it out
+            return e
+        return None
     
-    try:
-        from chatkit.server import ChatKitServer
-        from chatkit.widgets import Card, Text, Title
-        from chatkit.actions import ActionConfig
-        print("✅ ChatKit")
-    except ImportError as e:
-        print(f"❌ ChatKit: {e}")
-        return False
-        
-    try:
-        from agents import Agent, Runner, function_tool
-        print("✅ Agents")
-    except ImportError as e:
-        print(f"❌ Agents: {e}")
-        return False
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        errors = list(pool.map(attempt, modules))
+    # Retry those one at a time, now that nothing else is importing
+    return [
+        attempt(module) if isinstance(error, RuntimeError) else error
+        for module, error in zip(modules, errors)
+    ]
+
+def _find_all(modules):
+    """Like _import_all, but only locates each module without running it"""
+    return [
+        None if importlib.util.find_spec(module) is not None
+        else ImportError(f"No module named '{module}'")
+        for module in modules
+    ]
+
+def check_imports(deep: bool = False):
+    """Check all required imports. By default this only locates each
+    package (no module code runs); `deep` actually imports them, plus the
+    ChatKit entry points, for diagnosing a broken install."""
+    print("🔍 Checking imports...")
     
-    try:
-        import asyncpg
-        print("✅ AsyncPG")
-    except ImportError as e:
-        print(f"❌ AsyncPG: {e}")
-        return False
-        
-    try:
-        import httpx
-        print("✅ HTTPX")
-    except ImportError as e:
-        print(f"❌ HTTPX: {e}")
-        return False
+    labels = [label for label, _ in _DEPENDENCIES]
+    modules = [module for _, module in _DEPENDENCIES]
+    if deep:
+        labels += _ENTRY_POINTS
+        errors = _import_all(modules + list(_ENTRY_POINTS))
+    else:
+        errors = _find_all(modules)
     
-    return True
+    ok = True
+    for label, error in zip(labels, errors):
+        if error is None:
+            print(f"✅ {label}")
+        else:
+            print(f"❌ {label}: {error}")
+            ok = False
+    return ok
 
 def check_environment():
     """Check environment variables"""
@@ -72,38 +94,29 @@ def check_environment():
     
     return True
 
-def check_custom_modules():
+def check_custom_modules(deep: bool = False):
     """Check our custom modules"""
     print("\n📦 Checking custom modules...")
     
-    try:
-        from parleyapp_tools import WebSearchTool, SportsDataTool, StatMuseTool, BettingAnalysisTool
-        print("✅ parleyapp_tools")
-    except ImportError as e:
-        print(f"❌ parleyapp_tools: {e}")
-        return False
-    
-    try:
-        from parleyapp_widgets import (
-            create_search_progress_widget,
-            create_odds_comparison_widget,
-            create_parlay_builder_widget
-        )
-        print("✅ parleyapp_widgets")
-    except ImportError as e:
-        print(f"❌ parleyapp_widgets: {e}")
-        return False
+    errors = (_import_all if deep else _find_all)(_CUSTOM_MODULES)
     
-    return True
+    ok = True
+    for module, error in zip(_CUSTOM_MODULES, errors):
+        if error is None:
+            print(f"✅ {module}")
+        else:
+            print(f"❌ {module}: {error}")
+            ok = False
+    return ok
 
-def main():
+def main(deep: bool = False):
     print("🚀 Professor Lock Server Startup Check")
     print("=" * 40)
     
     # Check all components
-    imports_ok = check_imports()
+    imports_ok = check_imports(deep)
     env_ok = check_environment()
-    modules_ok = check_custom_modules()
+    modules_ok = check_custom_modules(deep)
     
     print("\n" + "=" * 40)
     if imports_ok and env_ok and modules_ok:
@@ -114,4 +127,5 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main())
+    # Run by hand, do the full import-based diagnosis
+    sys.exit(main(deep=True))
@@ -0,0 +1,132 @@
+import re
+from types import SimpleNamespace
+from typing import Any
+
+# The keyset filter built by chatkit_supabase_store._after_cursor
+_CURSOR_FILTER = re.compile(
+    r'created_at\.(gt|lt)\."([^"]+)",and\(created_at\.eq\."([^"]+)",id\.(gt|lt)\."([^"]+)"\)'
+)
+
+_COMPARE = {
+    "eq": lambda a, b: a == b,
+    "gt": lambda a, b: a > b,
+    "lt": lambda a, b: a < b,
+    "gte": lambda a, b: a >= b,
+}
+
+
+class FakeQuery:
+    """In-memory stand-in for a postgrest-py request builder.
+
+    Supports the subset of the builder chain SupabaseStore uses and records
+    every executed query on the owning FakeSupabase.
+    """
+
+    def __init__(self, client: "FakeSupabase", table: str):
+        self.client = client
+        self.table = table
+        self.op = "select"
+        self.columns: str | None = None
+        self.payload: Any = None
+        self.filters: list[tuple[str, str, Any]] = []
+        self.ordering: list[tuple[str, bool]] = []
+        self.row_limit: int | None = None
+
+    def select(self, columns: str) -> "FakeQuery":
+        self.columns = columns
+        return self
+
+    def upsert(self, rows: Any) -> "FakeQuery":
+        self.op = "upsert"
+        self.payload = rows if isinstance(rows, list) else [rows]
+        return self
+
+    def delete(self) -> "FakeQuery":
+        self.op = "delete"
+        return self
+
+    def eq(self, column: str, value: Any) -> "FakeQuery":
+        self.filters.append(("eq", column, value))
+        return self
+
+    def in_(self, column: str, values: Any) -> "FakeQuery":
+        self.filters.append(("in", column, list(values)))
+        return self
+
+    def filter(self, column: str, op: str, value: Any) -> "FakeQuery":
+        self.filters.append((op, column, value))
+        return self
+
+    def or_(self, expression: str) -> "FakeQuery":
+        self.filters.append(("cursor", "", expression))
+        return self
+
+    def order(self, column: str, desc: bool = False) -> "FakeQuery":
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, count: int) -> "FakeQuery":
+        self.row_limit = count
+        return self
+
+    def _matches(self, row: dict[str, Any]) -> bool:
+        for op, column, value in self.filters:
+            if op == "in":
+                if row[column] not in value:
+                    return False
+            elif op == "cursor":
+                match = _CURSOR_FILTER.fullmatch(value)
+                assert match, f"unexpected or_ filter: {value}"
+                cmp, created_at, _, id_cmp, row_id = match.groups()
+                if not (
+                    _COMPARE[cmp](row["created_at"], created_at)
+                    or (row["created_at"] == created_at and _COMPARE[id_cmp](row["id"], row_id))
+                ):
+                    return False
+            elif not _COMPARE[op](row[column], value):
+                return False
+        return True
+
+    def execute(self) -> SimpleNamespace:
+        self.client.executed.append(self)
+        if self.client.error is not None:
+            raise self.client.error
+        rows = self.client.tables.setdefault(self.table, [])
+        if self.op == "upsert":
+            for row in self.payload:
+                if row["id"] in self.client.rejected_ids:
+                    raise ValueError(f"row {row['id']} violates a constraint")
+            by_id = {row["id"]: i for i, row in enumerate(rows)}
+            for row in self.payload:
+                if row["id"] in by_id:
+                    rows[by_id[row["id"]]] = dict(row)
+                else:
+                    rows.append(dict(row))
+            return SimpleNamespace(data=self.payload)
+        if self.op == "delete":
+            deleted = [row for row in rows if self._matches(row)]
+            rows[:] = [row for row in rows if not self._matches(row)]
+            return SimpleNamespace(data=deleted)
+
+        selected = [dict(row) for row in rows if self._matches(row)]
+        # Stable sorts applied last key first give a multi-key ORDER BY
+        for column, desc in reversed(self.ordering):
+            selected.sort(key=lambda row: row[column], reverse=desc)
+        if self.row_limit is not None:
+            selected = selected[: self.row_limit]
+        return SimpleNamespace(data=selected)
+
+
+class FakeSupabase:
+    """Just enough of supabase.Client for SupabaseStore: `table()` queries
+    over in-memory rows. Set `error` to make every execute() raise it, or add
+    ids to `rejected_ids` to fail any upsert that includes those rows."""
+
+    def __init__(self) -> None:
+        self.tables: dict[str, list[dict[str, Any]]] = {}
+        self.executed: list[FakeQuery] = []
+        self.error: Exception | None = None
+        self.rejected_ids: set[str] = set()
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
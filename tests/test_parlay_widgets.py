@@ -0,0 +1,43 @@
+import math
+
+import pytest
+
+import parleyapp_widgets
+import pp_widgets
+
+ODDS = [-110, 150, -200, 120, -105, 300, -150, 110]
+
+
+def legs(odds):
+    return [{"pick": f"Pick {i}", "match": "A @ B", "odds": o, "confidence": 70} for i, o in enumerate(odds)]
+
+
+@pytest.mark.parametrize("bad", [None, 0, "+150", "oops", float("nan"), float("inf")])
+def test_total_odds_agree_across_vector_and_scalar_paths(bad):
+    odds = [*ODDS, bad]
+    long_legs = legs(odds)
+    expected = math.prod(parleyapp_widgets._american_to_decimal(o) for o in odds)
+
+    total = parleyapp_widgets._total_decimal_odds(long_legs)
+
+    assert math.isfinite(total)
+    assert total == pytest.approx(expected)
+
+
+def test_total_odds_vector_path_matches_scalar_for_numbers():
+    expected = math.prod(parleyapp_widgets._american_to_decimal(o) for o in ODDS)
+
+    assert parleyapp_widgets._total_decimal_odds(legs(ODDS)) == pytest.approx(expected)
+
+
+
+@pytest.mark.parametrize("bad", [None, 0, "+150", float("nan")])
+def test_pp_total_odds_agree_across_vector_and_scalar_paths(bad):
+    odds = [*ODDS, bad]
+    expected = math.prod(pp_widgets._american_to_decimal(o) for o in odds)
+
+    total = pp_widgets._total_decimal_odds(legs(odds))
+
+    assert math.isfinite(total)
+    assert total == pytest.approx(expected)
+
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from parleyapp_tools import _SWRCache
+
+
+def make_stale(cache, key, value):
+    # Halfway between ttl and 2 * ttl: stale, but still servable
+    cache._entries[key] = (time.monotonic() - 1.5 * cache.ttl, value)
+
+
+async def test_swr_cache_fresh_hit_skips_fetch():
+    cache = _SWRCache(ttl=60)
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        return "value"
+
+    assert await cache.get("odds", fetch) == "value"
+    assert await cache.get("odds", fetch) == "value"
+    assert calls == 1
+
+
+async def test_swr_cache_serves_stale_value_during_a_single_refresh():
+    cache = _SWRCache(ttl=60)
+    make_stale(cache, "odds", "stale")
+    release = asyncio.Event()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "fresh"
+
+    results = await asyncio.gather(*(cache.get("odds", fetch) for _ in range(3)))
+    await asyncio.sleep(0)
+
+    assert results == ["stale"] * 3
+    assert calls == 1
+
+    release.set()
+    await asyncio.gather(*cache._tasks)
+
+    assert await cache.get("odds", fetch) == "fresh"
+    assert calls == 1
+
+
+async def test_swr_cache_fetches_inline_once_expired():
+    cache = _SWRCache(ttl=60)
+    cache._entries["odds"] = (time.monotonic() - 3 * cache.ttl, "expired")
+
+    async def fetch():
+        return "fresh"
+
+    assert await cache.get("odds", fetch) == "fresh"
+    assert not cache._tasks
+
+
+async def test_swr_cache_keeps_stale_value_when_refresh_fails(caplog):
+    cache = _SWRCache(ttl=60)
+    make_stale(cache, "odds", "stale")
+
+    async def fetch():
+        raise RuntimeError("upstream down")
+
+    with caplog.at_level(logging.WARNING, logger="parleyapp.tools"):
+        assert await cache.get("odds", fetch) == "stale"
+        await asyncio.gather(*cache._tasks)
+
+    assert "upstream down" in caplog.text
+    assert cache._entries["odds"][1] == "stale"
+    assert "odds" not in cache._refreshing
@@ -0,0 +1,90 @@
+import pytest
+from starlette.requests import Request
+
+import simple_app
+from chatkit.store import NotFoundError
+from simple_app import _page_after, _read_body
+
+ENTRIES = {f"id_{i}": i for i in range(5)}
+
+
+def test_page_after_asc():
+    page = _page_after(ENTRIES, None, 2, "asc")
+
+    assert page.data == [0, 1]
+    assert page.has_more
+    assert page.after == "id_1"
+
+
+def test_page_after_desc():
+    page = _page_after(ENTRIES, None, 2, "desc")
+
+    assert page.data == [4, 3]
+    assert page.has_more
+    assert page.after == "id_3"
+
+
+@pytest.mark.parametrize(
+    ("order", "expected"),
+    [("asc", [[0, 1], [2, 3], [4]]), ("desc", [[4, 3], [2, 1], [0]])],
+)
+def test_page_after_follows_cursor_to_the_end(order, expected):
+    pages = []
+    after = None
+    while True:
+        page = _page_after(ENTRIES, after, 2, order)
+        pages.append(page.data)
+        if not page.has_more:
+            break
+        after = page.after
+
+    assert pages == expected
+
+
+def test_page_after_last_item_is_an_empty_final_page():
+    page = _page_after(ENTRIES, "id_4", 2, "asc")
+
+    assert page.data == []
+    assert not page.has_more
+    assert page.after is None
+
+
+def test_page_after_unknown_cursor_raises():
+    with pytest.raises(NotFoundError):
+        _page_after(ENTRIES, "id_missing", 2, "asc")
+
+
+def make_request(chunks, content_length=None):
+    headers = []
+    if content_length is not None:
+        headers.append((b"content-length", content_length.encode()))
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    return Request({"type": "http", "method": "POST", "headers": headers}, receive)
+
+
+@pytest.mark.parametrize("content_length", [None, "not-a-number", "3"])
+async def test_read_body_returns_what_arrives(content_length):
+    body = await _read_body(make_request([b"ab", b"c"], content_length))
+
+    assert bytes(body) == b"abc"
+
+
+@pytest.mark.parametrize("content_length", [None, "not-a-number"])
+async def test_read_body_caps_bodies_without_a_usable_length(monkeypatch, content_length):
+    monkeypatch.setattr(simple_app, "_MAX_BODY_BYTES", 4)
+
+    assert await _read_body(make_request([b"abc", b"def"], content_length)) is None
+
+
+async def test_read_body_caps_bodies_that_outgrow_their_length(monkeypatch):
+    monkeypatch.setattr(simple_app, "_PREALLOCATE_BODY_BYTES", 1)
+    monkeypatch.setattr(simple_app, "_MAX_BODY_BYTES", 4)
+
+    assert await _read_body(make_request([b"abc", b"def"], "3")) is None
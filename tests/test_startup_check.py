@@ -0,0 +1,20 @@
+import startup_check
+
+
+def test_import_all_retries_imports_that_hit_a_deadlock(monkeypatch):
+    calls = []
+
+    def import_module(name):
+        calls.append(name)
+        if name == "cyclic" and calls.count(name) == 1:
+            raise RuntimeError("deadlock detected by _ModuleLock('cyclic')")
+        if name == "missing":
+            raise ImportError("No module named 'missing'")
+
+    monkeypatch.setattr(startup_check.importlib, "import_module", import_module)
+
+    errors = startup_check._import_all(["json", "cyclic", "missing"])
+
+    assert errors[0] is None and errors[1] is None
+    assert isinstance(errors[2], ImportError)
+    assert calls.count("cyclic") == 2
@@ -0,0 +1,361 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from helpers.fake_postgrest import FakeQuery, FakeSupabase
+
+import chatkit_supabase_store
+from chatkit.types import AssistantMessageContent, AssistantMessageItem
+from chatkit_supabase_store import (
+    SupabaseStore,
+    _BatchLoader,
+    _LocalModelCache,
+    _ModelCache,
+    _WriteBatcher,
+    _after_cursor,
+    _encode_cursor,
+    _raise_rate_limited,
+)
+
+
+@pytest.fixture
+def supabase(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "1")
+    client = FakeSupabase()
+    monkeypatch.setattr(chatkit_supabase_store, "get_supabase_client", lambda url, key: client)
+    return client
+
+
+def make_item(item_id, thread_id="thread_1", created_at=None):
+    return AssistantMessageItem(
+        id=item_id,
+        content=[AssistantMessageContent(text=f"Message {item_id}")],
+        thread_id=thread_id,
+        created_at=created_at or datetime.now(),
+    )
+
+
+def item_row(item, thread_id="thread_1"):
+    return {
+        "id": item.id,
+        "thread_id": thread_id,
+        "item_data": item.model_dump(mode="json"),
+        "created_at": item.created_at.isoformat(),
+    }
+
+
+async def test_batch_loader_coalesces_concurrent_loads():
+    batches = []
+
+    async def fetch(keys):
+        batches.append(sorted(keys))
+        return {key: f"value-{key}" for key in keys}
+
+    loader = _BatchLoader(fetch)
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"))
+
+    assert results == ["value-a", "value-b", "value-a"]
+    assert batches == [["a", "b"]]
+
+
+async def test_batch_loader_starts_a_new_batch_after_dispatch():
+    batches = []
+
+    async def fetch(keys):
+        batches.append(list(keys))
+        return {key: key for key in keys}
+
+    loader = _BatchLoader(fetch)
+    assert await loader.load("a") == "a"
+    assert await loader.load("b") == "b"
+    assert batches == [["a"], ["b"]]
+
+
+async def test_batch_loader_resolves_missing_keys_to_none():
+    async def fetch(keys):
+        return {"a": 1}
+
+    loader = _BatchLoader(fetch)
+    assert await asyncio.gather(loader.load("a"), loader.load("missing")) == [1, None]
+
+
+async def test_batch_loader_fails_every_waiter_when_the_batch_fails():
+    async def fetch(keys):
+        raise RuntimeError("boom")
+
+    loader = _BatchLoader(fetch)
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+
+
+async def test_concurrent_load_item_calls_share_one_query(supabase):
+    first, second = make_item("msg_1"), make_item("msg_2")
+    supabase.tables["chatkit_thread_items"] = [item_row(first), item_row(second)]
+    store = SupabaseStore()
+
+    loaded = await asyncio.gather(
+        store.load_item("thread_1", "msg_1", None),
+        store.load_item("thread_1", "msg_2", None),
+    )
+
+    assert [item.id for item in loaded] == ["msg_1", "msg_2"]
+    assert len(supabase.executed) == 1
+    [(op, column, ids)] = supabase.executed[0].filters
+    assert (op, column, sorted(ids)) == ("in", "id", ["msg_1", "msg_2"])
+
+
+async def test_load_item_raises_for_missing_item(supabase):
+    supabase.tables["chatkit_thread_items"] = [item_row(make_item("msg_1"))]
+    store = SupabaseStore()
+
+    results = await asyncio.gather(
+        store.load_item("thread_1", "msg_1", None),
+        store.load_item("thread_1", "msg_missing", None),
+        return_exceptions=True,
+    )
+
+    assert results[0].id == "msg_1"
+    assert isinstance(results[1], ValueError)
+    assert len(supabase.executed) == 1
+
+
+async def test_load_item_failure_reaches_every_concurrent_caller(supabase):
+    supabase.error = RuntimeError("PostgREST is down")
+    store = SupabaseStore()
+
+    results = await asyncio.gather(
+        store.load_item("thread_1", "msg_1", None),
+        store.load_item("thread_1", "msg_2", None),
+        return_exceptions=True,
+    )
+
+    assert [str(result) for result in results] == ["PostgREST is down"] * 2
+    # Not a transient error, so it is not retried either
+    assert len(supabase.executed) == 1
+
+
+def rate_limited(retry_after):
+    request = httpx.Request("GET", "https://example.supabase.co/rest/v1/chatkit_threads")
+    response = httpx.Response(429, headers={"Retry-After": retry_after}, request=request)
+    with pytest.raises(httpx.HTTPStatusError) as raised:
+        _raise_rate_limited(response)
+    return raised.value
+
+
+@pytest.mark.parametrize(("retry_after", "expected"), [("3", 3.0), ("600", 10.0)])
+async def test_execute_waits_out_retry_after_up_to_a_cap(supabase, monkeypatch, retry_after, expected):
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(chatkit_supabase_store.asyncio, "sleep", sleep)
+    supabase.error = rate_limited(retry_after)
+    query = supabase.table("chatkit_threads").select("id")
+
+    def execute():
+        # Rate limited once, then let through
+        try:
+            return FakeQuery.execute(query)
+        finally:
+            supabase.error = None
+
+    query.execute = execute
+    await SupabaseStore()._execute(query)
+
+    assert sleeps == [expected]
+    assert len(supabase.executed) == 2
+
+
+def test_rate_limit_hook_leaves_other_responses_alone():
+    request = httpx.Request("GET", "https://example.supabase.co/rest/v1/chatkit_threads")
+
+    _raise_rate_limited(httpx.Response(503, request=request))
+    _raise_rate_limited(httpx.Response(200, request=request))
+
+
+@pytest.mark.parametrize(
+    ("workers", "expected"),
+    [("1", _LocalModelCache), ("4", _ModelCache), (None, _ModelCache)],
+)
+def test_store_cache_is_process_local_only_for_one_worker(supabase, monkeypatch, workers, expected):
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    if workers is None:
+        monkeypatch.delenv("WEB_CONCURRENCY")
+    else:
+        monkeypatch.setenv("WEB_CONCURRENCY", workers)
+
+    assert type(SupabaseStore()._thread_cache) is expected
+
+
+async def test_cached_thread_is_copied_for_each_caller(supabase):
+    supabase.tables["chatkit_threads"] = [
+        {"id": "thread_1", "title": "Original", "created_at": "2025-01-01T12:00:00", "metadata": {}}
+    ]
+    store = SupabaseStore()
+
+    first = await store.load_thread("thread_1", None)
+    first.title = "Changed"
+    first.metadata["key"] = "value"
+    second = await store.load_thread("thread_1", None)
+
+    assert second.title == "Original"
+    assert second.metadata == {}
+    assert len(supabase.executed) == 1
+
+
+async def test_write_batcher_groups_concurrent_rows():
+    batches = []
+
+    async def write(rows):
+        batches.append(rows)
+
+    batcher = _WriteBatcher(write)
+    await asyncio.gather(batcher.submit({"id": 1}), batcher.submit({"id": 2}))
+
+    assert batches == [[{"id": 1}, {"id": 2}]]
+
+
+async def test_write_batcher_splits_at_max_batch():
+    batches = []
+
+    async def write(rows):
+        batches.append([row["id"] for row in rows])
+
+    batcher = _WriteBatcher(write, max_batch=2)
+    await asyncio.gather(*(batcher.submit({"id": i}) for i in range(3)))
+
+    assert batches == [[0, 1], [2]]
+
+
+async def test_write_batcher_failure_reaches_every_submitter():
+    async def write(rows):
+        raise RuntimeError("upsert failed")
+
+    batcher = _WriteBatcher(write)
+    results = await asyncio.gather(
+        batcher.submit({"id": 1}), batcher.submit({"id": 2}), return_exceptions=True
+    )
+
+    assert [str(result) for result in results] == ["upsert failed"] * 2
+
+
+async def test_write_batcher_fails_only_the_bad_row():
+    batches = []
+
+    async def write(rows):
+        batches.append([row["id"] for row in rows])
+        if any(row["id"] == 2 for row in rows):
+            raise RuntimeError("bad row")
+
+    batcher = _WriteBatcher(write)
+    results = await asyncio.gather(
+        *(batcher.submit({"id": i}) for i in range(1, 4)), return_exceptions=True
+    )
+
+    assert results[0] is None and results[2] is None
+    assert str(results[1]) == "bad row"
+    assert batches[0] == [1, 2, 3]
+    assert sorted(batches[1:]) == [[1], [2], [3]]
+
+
+async def test_write_batcher_flush_drains_pending_rows():
+    batches = []
+
+    async def write(rows):
+        batches.append(rows)
+
+    # A long delay, so only flush() can be what writes the row
+    batcher = _WriteBatcher(write, delay=60)
+    submit = asyncio.create_task(batcher.submit({"id": 1}))
+    await asyncio.sleep(0)
+    assert batches == []
+
+    await asyncio.wait_for(batcher.flush(), timeout=1)
+
+    assert batches == [[{"id": 1}]]
+    await asyncio.wait_for(submit, timeout=1)
+
+
+async def test_store_flush_writes_queued_items(supabase):
+    store = SupabaseStore()
+    item = make_item("msg_1")
+    add = asyncio.create_task(store.add_thread_item("thread_1", item, None))
+    await asyncio.sleep(0)
+
+    await store.flush()
+    await add
+
+    [row] = supabase.tables["chatkit_thread_items"]
+    assert row["id"] == "msg_1"
+    assert row["thread_id"] == "thread_1"
+
+
+async def test_failed_item_upsert_is_logged(supabase, caplog):
+    supabase.error = RuntimeError("PostgREST is down")
+    store = SupabaseStore()
+
+    await store.add_thread_item("thread_1", make_item("msg_1"), None)
+
+    assert "PostgREST is down" in caplog.text
+
+
+async def test_bad_item_does_not_drop_items_batched_with_it(supabase, caplog):
+    supabase.rejected_ids.add("msg_bad")
+    store = SupabaseStore()
+
+    await asyncio.gather(
+        store.add_thread_item("thread_1", make_item("msg_1"), {"user_id": "user_a"}),
+        store.add_thread_item("thread_1", make_item("msg_bad"), {"user_id": "user_b"}),
+        store.add_thread_item("thread_1", make_item("msg_2"), {"user_id": "user_c"}),
+    )
+
+    stored = sorted(row["id"] for row in supabase.tables["chatkit_thread_items"])
+    assert stored == ["msg_1", "msg_2"]
+    assert "msg_bad" in caplog.text
+
+
+def test_after_cursor_round_trips_created_at_and_id():
+    created_at = "2025-01-01T12:00:00.123456+00:00"
+    cursor = _encode_cursor(created_at, "msg_3")
+
+    query = _after_cursor(FakeSupabase().table("chatkit_thread_items"), cursor, desc=False)
+
+    assert query.filters == [
+        (
+            "cursor",
+            "",
+            f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt."msg_3")',
+        )
+    ]
+
+
+def test_after_cursor_accepts_bare_timestamp_cursors():
+    created_at = "2025-01-01T12:00:00+00:00"
+
+    query = _after_cursor(FakeSupabase().table("chatkit_thread_items"), created_at, desc=True)
+
+    assert query.filters == [("lt", "created_at", created_at)]
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+async def test_item_pages_break_created_at_ties_by_id(supabase, order):
+    shared = datetime(2025, 1, 1, 12, 0, 0)
+    items = [make_item(f"msg_{i}", created_at=shared) for i in range(5)]
+    items.append(make_item("msg_later", created_at=shared + timedelta(seconds=1)))
+    supabase.tables["chatkit_thread_items"] = [item_row(item) for item in items]
+    store = SupabaseStore()
+
+    seen = []
+    after = None
+    while True:
+        page = await store.load_thread_items("thread_1", after, 2, order, None)
+        seen.extend(item.id for item in page.data)
+        if not page.has_more:
+            break
+        after = page.after
+
+    expected = [f"msg_{i}" for i in range(5)] + ["msg_later"]
+    assert seen == (expected if order == "asc" else expected[::-1])